@@ -0,0 +1,101 @@
+from src.graph import SirGraph, FrontierSirGraph, AdaptiveSirGraph
+from src.graph_methods import random_graph, get_reachable, get_degree_dist, get_friends_degree
+from src.models import non_infected_probs, outbreak_cluster_size
+
+# Graph sizes and mean degrees of each scale; a case runs at every size up to its own max_nodes
+SCALES = {
+    'small': ([1_000, 10_000], [5, 20]),
+    'medium': ([1_000, 10_000, 100_000], [5, 20]),
+    'full': ([1_000, 10_000, 100_000, 1_000_000], [5, 20]),
+}
+
+
+class Case(object):
+    """
+    One benchmarked call. setup builds its arguments outside the timed region, run is what gets measured.
+    """
+
+    def __init__(self, name: str, setup, run, max_nodes: int = 1_000_000, number: int = 3):
+        """
+        :param name: case name, unique within CASES.
+        :param setup: function (graph, num_nodes, deg, seed) returning the argument passed to run.
+        :param run: function of that argument, the measured call.
+        :param max_nodes: largest graph size the case is run at.
+        :param number: number of timed runs; the fastest is reported.
+        """
+        self.name = name
+        self.setup = setup
+        self.run = run
+        self.max_nodes = max_nodes
+        self.number = number
+
+
+def _generate(method: str):
+    def setup(graph, num_nodes, deg, seed):
+        return num_nodes, deg, seed
+
+    def run(args):
+        num_nodes, deg, seed = args
+        if method in ('naive', 'two-step', 'sparse'):
+            return random_graph(num_nodes, p=deg / (num_nodes - 1), method=method, rng=seed)
+        # p is the rewiring probability of 'watts-strogatz' and unused by the other methods
+        return random_graph(num_nodes, p=0.1, deg=deg, method=method, csr=True, rng=seed)
+    return setup, run
+
+
+def _graph(graph, num_nodes, deg, seed):
+    return graph
+
+
+def _list_graph(graph, num_nodes, deg, seed):
+    return graph.to_graph()
+
+
+def _sir(cls):
+    def setup(graph, num_nodes, deg, seed):
+        return cls(graph, rng=seed), 2 / deg
+
+    def run(args):
+        sir, rate = args
+        sir.set_init_state(0.01)
+        return sir.run(rate)
+    return setup, run
+
+
+def _adaptive_sir(graph, num_nodes, deg, seed):
+    return graph, 2 / deg, seed
+
+
+def _run_adaptive_sir(args):
+    # The network is copied into a fresh DynamicGraph, so every run rewires the same starting graph
+    graph, rate, seed = args
+    return AdaptiveSirGraph(graph, prob=0.01, rewire_rate=0.3, rng=seed).run(rate)
+
+
+def _infected_estimate(graph, num_nodes, deg, seed):
+    return FrontierSirGraph(graph, prob=0.01, rng=seed), 2 / deg
+
+
+CASES = [
+    Case('random_graph/naive', *_generate('naive'), max_nodes=1_000, number=1),
+    Case('random_graph/two-step', *_generate('two-step'), max_nodes=10_000, number=1),
+    Case('random_graph/sparse', *_generate('sparse'), max_nodes=100_000),
+    Case('random_graph/geometric', *_generate('geometric')),
+    Case('random_graph/poisson', *_generate('poisson')),
+    Case('random_graph/power-law', *_generate('power-law')),
+    Case('random_graph/chung-lu', *_generate('chung-lu')),
+    Case('random_graph/barabasi-albert', *_generate('barabasi-albert')),
+    Case('random_graph/watts-strogatz', *_generate('watts-strogatz')),
+    Case('get_reachable', _graph, lambda graph: get_reachable(graph, 0)),
+    Case('get_degree_dist/list', _list_graph, get_degree_dist, max_nodes=100_000),
+    Case('get_degree_dist/csr', _graph, get_degree_dist),
+    Case('get_friends_degree/sample', _graph, lambda graph: get_friends_degree(graph, repeat=100_000, rng=0)),
+    Case('get_friends_degree/iterate', _graph, lambda graph: get_friends_degree(graph, method='iterate')),
+    Case('SirGraph.run', *_sir(SirGraph), max_nodes=100_000),
+    Case('FrontierSirGraph.run', *_sir(FrontierSirGraph)),
+    Case('AdaptiveSirGraph.run', _adaptive_sir, _run_adaptive_sir, max_nodes=1_000_000),
+    Case('infected_estimate', _infected_estimate,
+         lambda args: args[0].infected_estimate(args[1], repeat=20), max_nodes=100_000),
+    Case('non_infected_probs', _graph, lambda graph: non_infected_probs(graph, 0.2, tol=1e-6)),
+    Case('outbreak_cluster_size', _graph, lambda graph: outbreak_cluster_size(graph, 0.2, repeat=5, rng=0)),
+]
@@ -0,0 +1,154 @@
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import scipy
+from benchmarks.cases import CASES, SCALES
+from src.graph_methods import random_graph
+
+bench_dir = Path(__file__).parent
+baseline_path = bench_dir / 'baseline.json'
+results_path = bench_dir / 'results' / 'latest.json'
+
+SEED = 2024
+# Runs faster than this are dominated by timer noise and are not flagged as regressions
+MIN_TIME = 1e-3
+
+
+def run_benchmarks(scale: str = 'small', pattern: str | None = None, seed: int = SEED, verbose: bool = True) -> dict:
+    """
+    Run every case matching pattern at every graph size and mean degree of a scale.
+    Each case is run once under tracemalloc for its peak memory, then number times untraced for its wall time.
+    :param scale: one of SCALES.
+    :param pattern: only run cases whose name contains this string.
+    :param seed: seed of the benchmark graphs and of the simulations.
+    :param verbose: whether to print each result as it is measured.
+    :return: A dict with the run metadata under 'meta' and one entry per measurement under 'results'.
+    """
+    if scale not in SCALES:
+        raise Exception(f'Scale {scale} is not supported.')
+    sizes, degrees = SCALES[scale]
+    cases = [case for case in CASES if pattern is None or pattern in case.name]
+
+    results = {}
+    for num_nodes in sizes:
+        for deg in degrees:
+            todo = [case for case in cases if num_nodes <= case.max_nodes]
+            if not todo:
+                continue
+            graph = random_graph(num_nodes, deg=deg, method='poisson', csr=True, rng=seed)
+            for case in todo:
+                key = f'{case.name}[n={num_nodes},deg={deg}]'
+                results[key] = _measure(case, graph, num_nodes, deg, seed)
+                results[key].update(case=case.name, num_nodes=num_nodes, deg=deg)
+                if verbose:
+                    print(f"{key:<55} {results[key]['time']:10.4f} s {results[key]['peak_bytes'] / 2 ** 20:10.1f} MiB")
+            del graph
+            gc.collect()
+    return {'meta': _metadata(scale, seed), 'results': results}
+
+
+def compare(results: dict, baseline: dict, time_threshold: float = 0.25,
+            memory_threshold: float = 0.25) -> list[str]:
+    """
+    Compare a run against a baseline run.
+    :param results: output of run_benchmarks.
+    :param baseline: an earlier output of run_benchmarks.
+    :param time_threshold: relative slowdown above which a case is reported.
+    :param memory_threshold: relative growth of peak memory above which a case is reported.
+    :return: A list of descriptions of the regressions, empty if there are none.
+    """
+    regressions = []
+    for key, new in results['results'].items():
+        old = baseline['results'].get(key)
+        if old is None:
+            continue
+        if new['time'] > MIN_TIME and new['time'] > old['time'] * (1 + time_threshold):
+            regressions.append(f"{key}: time {old['time']:.4f} s -> {new['time']:.4f} s "
+                               f"({new['time'] / old['time']:.2f}x)")
+        if new['peak_bytes'] > old['peak_bytes'] * (1 + memory_threshold):
+            regressions.append(f"{key}: peak memory {old['peak_bytes'] / 2 ** 20:.1f} MiB -> "
+                               f"{new['peak_bytes'] / 2 ** 20:.1f} MiB")
+    return regressions
+
+
+def _measure(case, graph, num_nodes: int, deg: int, seed: int) -> dict:
+    # Setup is repeated before every run, so that stateful arguments such as SirGraph start afresh
+    arg = case.setup(graph, num_nodes, deg, seed)
+    gc.collect()
+    tracemalloc.start()
+    case.run(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    times = []
+    for _ in range(case.number):
+        arg = case.setup(graph, num_nodes, deg, seed)
+        gc.collect()
+        start = time.perf_counter()
+        case.run(arg)
+        times.append(time.perf_counter() - start)
+    return {'time': min(times), 'times': times, 'peak_bytes': peak}
+
+
+def _metadata(scale: str, seed: int) -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=bench_dir, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'scale': scale,
+        'seed': seed,
+        'commit': commit,
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'scipy': scipy.__version__,
+        'machine': platform.machine(),
+        'platform': platform.platform(),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the hot paths of the project.')
+    parser.add_argument('--scale', default='small', choices=sorted(SCALES))
+    parser.add_argument('-k', '--filter', default=None, help='only run cases whose name contains this string')
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('-o', '--output', type=Path, default=results_path, help='JSON file to write the results to')
+    parser.add_argument('--baseline', type=Path, default=baseline_path, help='JSON file of the baseline run')
+    parser.add_argument('--save-baseline', action='store_true', help='store this run as the new baseline')
+    parser.add_argument('--time-threshold', type=float, default=0.25)
+    parser.add_argument('--memory-threshold', type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.scale, args.filter, seed=args.seed)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(results, indent=2))
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2))
+        print(f'Saved baseline to {args.baseline}')
+        return 0
+    if not args.baseline.exists():
+        print('No baseline to compare against; store one with --save-baseline.')
+        return 0
+
+    regressions = compare(results, json.loads(args.baseline.read_text()),
+                          time_threshold=args.time_threshold, memory_threshold=args.memory_threshold)
+    for regression in regressions:
+        print('REGRESSION', regression)
+    if not regressions:
+        print('No regressions against the baseline.')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,7 @@
 import numpy as np
 import matplotlib.pyplot as plt
-from src.graph_methods.graph_gen import random_graph
-from src.graph_methods.graph_stats import get_reachable
+from src.io import cached_random_graph
+from src.graph_methods.traversal import component_sizes
 
 
 if __name__ == '__main__':
@@ -16,9 +16,11 @@ if __name__ == '__main__':
 
     for p in p_list:
         reach: float = 0.0
-        for _ in range(repeat):
-            network = random_graph(n, p, method='two-step')
-            reach += len(get_reachable(network))
+        for seed in range(repeat):
+            network = cached_random_graph(n, p, method='two-step', csr=True, seed=seed)
+            # Average reach over every starting node, from one labelling of all components
+            sizes = component_sizes(network)
+            reach += np.sum(sizes ** 2) / network.num_nodes
         reach /= repeat
         print("Average number of reachable nodes for p = {0:.8f}: {1:.2f}".format(p, reach))
         reach_list.append(reach)
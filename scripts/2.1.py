@@ -9,10 +9,10 @@ if __name__ == "__main__":
         graph_poi = random_graph(num_nodes=1000, deg=10, method='poisson')
 
 
-        plt.hist((get_degree_dist(graph_geo), [geometric_sample(1 / 10) for _ in range(100000)]),
+        plt.hist((get_degree_dist(graph_geo), geometric_sample(1 / 10, size=100000)),
                 color=['b', 'g'], density=True, bins=20, histtype='bar')
         plt.show()
 
-        plt.hist((get_degree_dist(graph_poi), [poisson_sample(10) for _ in range(100000)]),
+        plt.hist((get_degree_dist(graph_poi), poisson_sample(10, size=100000)),
                 color=['b', 'g'], density=True, bins=20, histtype='bar')
         plt.show()
\ No newline at end of file
@@ -3,8 +3,8 @@ from matplotlib import pyplot as plt
 from src.graph_methods import random_graph, get_degree_dist, get_friends_degree
 
 
-def friendship_comp(method: str) -> None:
-    graph = random_graph(num_nodes=1000, deg=10, method=method)
+def friendship_comp(method: str, num_nodes: int = 1000) -> None:
+    graph = random_graph(num_nodes=num_nodes, deg=10, method=method, csr=True)
     degree, friends_degree = get_friends_degree(graph, return_both=True)
 
     plt.hist((degree, friends_degree), bins=40, density=True, color=['b', 'g'], histtype='bar')
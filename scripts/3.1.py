@@ -1,6 +1,6 @@
 import numpy as np
 from matplotlib import pyplot as plt
-from src.graph import SirGraph as SIR
+from src.graph import SirGraph as SIR, ArrayObserver
 from src.graph_methods import random_graph
 from src.io import load_graph, save_dir
 
@@ -13,17 +13,12 @@ if __name__ == '__main__':
     graph = load_graph(path)
     for rate in transfer_rate_list:
         sir = SIR(graph, p_init)
-        transient_time = 0
-        S_count, I_count, R_count = [], [], []
-        while sir.has_infected():
-            sir.advance(rate)
-            transient_time += 1
-            S_count.append(sir.state.count(sir.S))
-            I_count.append(sir.state.count(sir.I))
-            R_count.append(sir.state.count(sir.R))
-        plt.plot(range(transient_time), S_count, color='blue', label='S')
-        plt.plot(range(transient_time), I_count, color='red', label='I')
-        plt.plot(range(transient_time), R_count, color='green', label='R')
+        observer = ArrayObserver()
+        sir.run(rate, observers=[observer])
+        steps, counts = observer.as_array()
+        plt.plot(steps, counts[:, sir.S], color='blue', label='S')
+        plt.plot(steps, counts[:, sir.I], color='red', label='I')
+        plt.plot(steps, counts[:, sir.R], color='green', label='R')
         plt.xlabel('Simulation steps')
         plt.ylabel('Number of nodes')
         plt.show()
\ No newline at end of file
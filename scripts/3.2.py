@@ -1,21 +1,19 @@
 import numpy as np
 from matplotlib import pyplot as plt
-from src.graph import SirGraph as SIR
-from src.io import load_graph, save_dir
-
-path = save_dir / 'rg_n10000_d20_p.pkl'
+from src.models import Sweep
 
 if __name__ == '__main__':
     p_init = 0.05
     rate_ind_list = np.linspace(-2, -0.5, 50)
     transfer_rate_list = np.power(10, rate_ind_list)
-    graph = load_graph(path)
-    recovered_list = []
-    for rate in transfer_rate_list:
-        sir = SIR(graph, p_init)
-        state, transient_time = sir.run(rate)
-        print(f"At rate {rate}, {state.count(sir.R)} recovered after {transient_time} steps")
-        recovered_list.append(state.count(sir.R))
+    # Finished cells are kept in saved_graphs/sweeps/3.2, so re-running only recomputes what is missing
+    sweep = Sweep('3.2', graphs={'poisson': 'rg_n10000_d20_p.pkl'}, models=['sir'], rates=transfer_rate_list,
+                  repeats=1, prob=p_init)
+    results = sweep.run()
+    order = np.argsort(results['rate'])
+    recovered_list = results['final_size'][order, 0]
+    for rate, recovered, transient_time in zip(results['rate'][order], recovered_list, results['duration'][order, 0]):
+        print(f"At rate {rate}, {recovered:.0f} recovered after {transient_time:.0f} steps")
 
     plt.plot(rate_ind_list, recovered_list)
     plt.xlabel('Transfer rate')
@@ -1,8 +1,8 @@
 import numpy as np
 from matplotlib import pyplot as plt
 
-from src.io import load_graph, save_dir
-from src.graph import SirGraph
+from src.io import load_csr, save_dir
+from src.graph import FrontierSirGraph
 from src.graph_methods import friend_infect_vec
 
 paths = [save_dir / 'rg_n10000_d20_g.pkl', save_dir / 'rg_n10000_d20_p.pkl']
@@ -10,9 +10,9 @@ keys = ['geometric', 'poisson']
 
 if __name__ == '__main__':
     for j in range(2):
-        graph = load_graph(paths[j])
+        graph = load_csr(paths[j])
         rate = 10 ** -1.6
-        sir = SirGraph(graph, prob=0.05)
+        sir = FrontierSirGraph(graph, prob=0.05)
         p_infect_vec = sir.infected_estimate(rate)
         p_friend_infect_vec = friend_infect_vec(graph=graph,
                                                 infect_vec=p_infect_vec)
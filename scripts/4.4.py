@@ -1,26 +1,22 @@
 import numpy as np
 from matplotlib import pyplot as plt
 
-from src.graph import SirGraph
-from src.io import load_graph, save_dir
-from src.models import outbreak_cluster_size
+from src.graph import vaccination_mask
+from src.io import load_csr, save_dir
+from src.models import percolation_sweep
 
 path = save_dir / 'rg_n10000_d20_p.pkl'
 
 if __name__ == '__main__':
-    graph = load_graph(path)
+    graph = load_csr(path)
     rate_ind_list = np.linspace(-2, -1, 20)
     transfer_rate_list = np.power(10, rate_ind_list)
-    for vac_rate in [0, 0.2, 0.4]:
-        res_list = []
-        for rate in transfer_rate_list:
-            sir = SirGraph(graph)
-            sir.vaccinate(vac_rate)
-            vac_list = [0 for _ in range(graph.num_nodes)]
-            for i in range(graph.num_nodes):
-                vac_list[i] = 1 if sir.state[i] == sir.V else 0
-            res = outbreak_cluster_size(graph, rate, vac_list=vac_list)
-            res_list.append(np.mean(res))
-            print(f'vac rate: {vac_rate:.2f} transfer rate: {rate:.3f} cluster size: {np.mean(res):.2f}')
-        plt.plot(rate_ind_list, res_list)
-    plt.show()
+    for strategy in ['uniform', 'degree', 'acquaintance']:
+        for vac_rate in [0, 0.2, 0.4]:
+            vac_mask = vaccination_mask(graph, vac_rate, strategy=strategy)
+            res_list, _, _ = percolation_sweep(graph, transfer_rate_list, repeat=50, vac_mask=vac_mask)
+            for rate, res in zip(transfer_rate_list, res_list):
+                print(f'{strategy} vac rate: {vac_rate:.2f} transfer rate: {rate:.3f} cluster size: {res:.2f}')
+            plt.plot(rate_ind_list, res_list, label=f'{strategy} {vac_rate:.1f}')
+    plt.legend()
+    plt.show()
\ No newline at end of file
@@ -0,0 +1,6 @@
+from src.io import convert_graph, save_dir
+
+if __name__ == '__main__':
+    for path in sorted(save_dir.glob('*.pkl')):
+        target = convert_graph(path)
+        print(f"Converted {path.name} to {target.name}")
\ No newline at end of file
@@ -9,7 +9,8 @@ if __name__ == '__main__':
     graph = random_graph(num_nodes=num_nodes,
                          deg=deg,
                          method=method)
-    filename = 'rg_n' + str(num_nodes) + '_d' + str(deg) + '_' + method[0] + '.pkl'
-    save_graph(graph=graph, filename=filename)
-    loaded_graph = load_graph(filename)
-
+    filename = 'rg_n' + str(num_nodes) + '_d' + str(deg) + '_' + method[0]
+    save_graph(graph=graph, filename=filename + '.pkl')
+    save_graph(graph=graph, filename=filename + '.csr',
+               params={'method': method, 'num_nodes': num_nodes, 'deg': deg})
+    loaded_graph = load_graph(filename + '.csr')
\ No newline at end of file
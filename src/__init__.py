@@ -1,2 +1,4 @@
+__version__ = '0.2.0'
+
 from src import graph
 from src import graph_methods
\ No newline at end of file
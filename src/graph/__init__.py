@@ -1 +1,8 @@
-from .graph import *
\ No newline at end of file
+from .graph import *
+from .csr import *
+from .frontier import *
+from .observers import *
+from .replicas import *
+from .gillespie import *
+from .vaccination import *
+from .dynamic import *
\ No newline at end of file
@@ -0,0 +1,186 @@
+import itertools
+
+import numpy as np
+from src.graph.graph import Graph
+
+
+class CsrGraph(object):
+    """
+    Immutable graph stored in compressed sparse row (CSR) form.
+
+    The neighbours of node i are indices[indptr[i]:indptr[i + 1]]. As with Graph, an
+    undirected edge is stored once in each direction.
+    """
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, directed: bool = False):
+        """
+        :param indptr: row pointer array of length num_nodes + 1.
+        :param indices: concatenated neighbour lists of all nodes.
+        :param directed: whether the graph is directed or undirected.
+        """
+        if len(indptr) < 2:
+            raise ValueError('Number of nodes must be greater than 1.')
+        if indptr[0] != 0 or indptr[-1] != len(indices):
+            raise ValueError('Row pointers do not match the neighbour array.')
+
+        self.num_nodes = len(indptr) - 1
+        self.directed = directed
+        self.indptr = _as_index_array(indptr, len(indices))
+        self.indices = _as_index_array(indices, self.num_nodes)
+        # Freeze the arrays so that neighbour slices can be handed out without copying
+        for array in (self.indptr, self.indices):
+            if array.flags.writeable:
+                array.flags.writeable = False
+        self._degrees = None
+        self._summary = None # Cached statistics, see src.graph_methods.summary.summarize
+        self.path = None # Set by src.io.load_csr when the arrays are memory-mapped from a file
+
+    def __reduce__(self):
+        # A memory-mapped graph is pickled as its file path, so worker processes map the same pages
+        if self.path is not None:
+            from src.io.graph_io import load_csr
+            return load_csr, (self.path,)
+        return CsrGraph, (np.asarray(self.indptr), np.asarray(self.indices), self.directed)
+
+    @classmethod
+    def from_graph(cls, graph: Graph) -> 'CsrGraph':
+        """
+        Convert a list-of-lists Graph into CSR form.
+        :param graph: the graph to convert.
+        :return: a CsrGraph with the same adjacency, in the same neighbour order.
+        """
+        lengths = np.fromiter((len(nbrs) for nbrs in graph.adj), dtype=np.int64, count=graph.num_nodes)
+        indptr = np.zeros(graph.num_nodes + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        indices = np.fromiter(itertools.chain.from_iterable(graph.adj), dtype=np.int64, count=int(indptr[-1]))
+        return cls(indptr, indices, directed=graph.directed)
+
+    @classmethod
+    def from_edges(cls, num_nodes: int, edges: np.ndarray, directed: bool = False) -> 'CsrGraph':
+        """
+        Build a graph directly from an edge array, without going through Graph.add_edge.
+        :param num_nodes: the number of nodes in the graph.
+        :param edges: integer array of shape (num_edges, 2) of (source, target) pairs.
+        :param directed: whether the graph is directed or undirected.
+        :return: a CsrGraph.
+        """
+        if num_nodes < 1:
+            raise ValueError('Number of nodes must be greater than 1.')
+        edges = np.asarray(edges).reshape(-1, 2)
+        if len(edges) and (edges.min() < 0 or edges.max() >= num_nodes):
+            raise ValueError('Index out of range.')
+
+        src, dst = edges[:, 0], edges[:, 1]
+        counts = np.bincount(src, minlength=num_nodes)
+        if not directed:
+            counts += np.bincount(dst, minlength=num_nodes)
+            src, dst = np.concatenate((src, dst)), np.concatenate((dst, src))
+        indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        # Sorting packed (source, target) keys in place groups the rows without the
+        # extra int64 permutation an argsort would allocate
+        keys = src.astype(np.int64)
+        del src
+        keys *= num_nodes
+        keys += dst
+        del dst
+        keys.sort()
+        np.remainder(keys, num_nodes, out=keys)
+        return cls(indptr, _as_index_array(keys, num_nodes), directed=directed)
+
+    def drop_nodes(self, mask: np.ndarray) -> 'CsrGraph':
+        """
+        Remove every edge touching the marked nodes, e.g. vaccinated ones, in one vectorized pass over the entries.
+        The nodes themselves are kept, isolated, so node indices are unchanged.
+        :param mask: boolean array marking the nodes to cut off.
+        :return: a new CsrGraph, or this one if no node is marked.
+        """
+        mask = np.asarray(mask, dtype=bool)
+        if len(mask) != self.num_nodes:
+            raise ValueError('Length of node mask does not match graph.')
+        if not mask.any():
+            return self
+        kept = ~mask[self.indices]
+        kept[np.repeat(mask, self.degrees)] = False
+        # Number of kept entries before each entry, read off at the old row boundaries
+        kept_before = np.zeros(self.num_entries + 1, dtype=np.int64)
+        np.cumsum(kept, out=kept_before[1:])
+        return CsrGraph(kept_before[self.indptr], self.indices[kept], directed=self.directed)
+
+    def to_graph(self) -> Graph:
+        """
+        Convert back into a mutable list-of-lists Graph.
+        :return: a Graph with the same adjacency.
+        """
+        graph = Graph(self.num_nodes, directed=self.directed)
+        bounds = self.indptr.tolist()
+        indices = self.indices.tolist()
+        graph.adj = [indices[bounds[i]:bounds[i + 1]] for i in range(self.num_nodes)]
+        return graph
+
+    def neighbors(self, i: int) -> np.ndarray:
+        """
+        Search for indices of all adjacent nodes of a node.
+        :param i: index of the source node.
+        :return: A read-only view into the neighbour array.
+        """
+        if not 0 <= i < self.num_nodes:
+            raise ValueError('Index out of range.')
+
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def gather(self, nodes: np.ndarray) -> np.ndarray:
+        """
+        Concatenate the neighbour lists of several nodes in one vectorized gather.
+        :param nodes: array of node indices.
+        :return: an array holding the neighbours of nodes[0], then those of nodes[1], and so on.
+        """
+        nodes = np.asarray(nodes)
+        starts = self.indptr[nodes].astype(np.int64)
+        lengths = self.indptr[nodes + 1] - starts
+        ends = np.cumsum(lengths)
+        # Position k of the output reads indices[starts[r] + k - (ends[r] - lengths[r])] for its row r
+        offsets = np.repeat(starts - ends + lengths, lengths)
+        offsets += np.arange(len(offsets))
+        return self.indices[offsets]
+
+    @property
+    def degrees(self) -> np.ndarray:
+        """
+        Out-degree of every node, computed once and cached.
+        """
+        if self._degrees is None:
+            self._degrees = np.diff(self.indptr)
+            self._degrees.flags.writeable = False
+        return self._degrees
+
+    @property
+    def num_entries(self) -> int:
+        """
+        Number of stored adjacency entries (twice the edge count for undirected graphs).
+        """
+        return len(self.indices)
+
+
+def as_csr(graph: Graph | CsrGraph) -> CsrGraph:
+    """
+    Return a CSR view of a graph, converting a list-of-lists Graph if needed.
+    The conversion is cached on the Graph and dropped again by Graph.add_edge.
+    :param graph: a Graph or CsrGraph.
+    :return: a CsrGraph.
+    """
+    if isinstance(graph, CsrGraph):
+        return graph
+    if hasattr(graph, 'snapshot'): # Graphs that rebuild their CSR incrementally, see src.graph.dynamic.DynamicGraph
+        return graph.snapshot()
+    if getattr(graph, '_csr', None) is None:
+        graph._csr = CsrGraph.from_graph(graph)
+    return graph._csr
+
+
+def _as_index_array(array: np.ndarray, max_value: int) -> np.ndarray:
+    # int32 whenever the values fit, to halve memory against the default int64
+    dtype = np.int32 if max_value <= np.iinfo(np.int32).max else np.int64
+    if isinstance(array, np.ndarray) and array.dtype == dtype:
+        return array
+    return np.asarray(array, dtype=dtype)
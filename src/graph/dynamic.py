@@ -0,0 +1,311 @@
+import itertools
+
+import numpy as np
+from src.graph.graph import Graph
+from src.graph.csr import CsrGraph, as_csr
+from src.graph.frontier import FrontierSirGraph
+from src.tools import instrument
+
+COMPACT_FRACTION = 8 # gather folds the changes into a new snapshot once more than num_nodes / this rows changed
+
+
+class DynamicGraph(Graph):
+    """
+    Mutable simple graph with O(1) edge insertion, removal and lookup.
+
+    Alongside the neighbour lists of Graph, each node keeps a dict from neighbour to its position in the list,
+    so an edge is removed by moving the last neighbour into its slot. The graph also keeps a CSR snapshot and
+    marks the rows changed since it was taken: gather reads unchanged rows from the snapshot and only the changed
+    ones from the lists, and the snapshot is rebuilt once enough rows have changed, so that both edits and
+    gathers stay cheap in amortised terms.
+    """
+
+    def __init__(self, num_nodes: int, directed=False):
+        """
+        :param num_nodes: the number of nodes in the graph.
+        :param directed: whether the graph is directed or undirected.
+        """
+        super().__init__(num_nodes, directed=directed)
+        self._pos = [dict() for _ in range(self.num_nodes)]
+        self.changes = [] # (added, i, j) for every edge added or removed since the last snapshot, see snapshot
+        self._snapshot = CsrGraph(np.zeros(self.num_nodes + 1, dtype=np.int64), np.zeros(0, dtype=np.int64),
+                                  directed=directed)
+        self._csr = self._snapshot
+        self._degrees = np.zeros(self.num_nodes, dtype=np.int64)
+        self._dirty = np.zeros(self.num_nodes, dtype=bool) # Rows that differ from the snapshot
+        self._num_dirty = 0
+        self._edited = set() # Rows edited since _degrees and _dirty were last brought up to date
+
+    @classmethod
+    def from_graph(cls, graph: Graph | CsrGraph) -> 'DynamicGraph':
+        """
+        Copy a graph into a DynamicGraph, dropping self-loops and repeated edges.
+        :param graph: the graph to copy.
+        :return: a DynamicGraph.
+        """
+        csr = as_csr(graph)
+        rows = np.repeat(np.arange(csr.num_nodes, dtype=np.int64), csr.degrees)
+        cols = csr.indices.astype(np.int64)
+        keep = rows != cols if csr.directed else rows < cols
+        keys = np.unique(rows[keep] * csr.num_nodes + cols[keep])
+        edges = np.stack(np.divmod(keys, csr.num_nodes), axis=1)
+        base = CsrGraph.from_edges(csr.num_nodes, edges, directed=csr.directed)
+
+        dynamic = cls(csr.num_nodes, directed=csr.directed)
+        dynamic.adj = base.to_graph().adj
+        dynamic._pos = [{j: k for k, j in enumerate(nbrs)} for nbrs in dynamic.adj]
+        dynamic._degrees = base.degrees.astype(np.int64)
+        dynamic._snapshot = dynamic._csr = base
+        return dynamic
+
+    def has_edge(self, i: int, j: int) -> bool:
+        """
+        :param i: index of the source node.
+        :param j: index of the target node.
+        :return: whether the edge from i to j exists.
+        """
+        return j in self._pos[i]
+
+    def add_edge(self, i: int, j: int) -> None:
+        """
+        Add an edge between nodes i and j, in O(1).
+        :param i: index of the source node.
+        :param j: index of the target node.
+        """
+        if i not in range(self.num_nodes) or j not in range(self.num_nodes):
+            raise ValueError('Index out of range.')
+        if i == j:
+            raise ValueError('Self-loops are not supported.')
+        if j in self._pos[i]:
+            raise ValueError('Edge already exists.')
+
+        self._insert(i, j)
+        if not self.directed:
+            self._insert(j, i)
+        self._log(True, i, j)
+
+    def remove_edge(self, i: int, j: int) -> None:
+        """
+        Remove the edge between nodes i and j, in O(1). The neighbour order of i (and j) changes.
+        :param i: index of the source node.
+        :param j: index of the target node.
+        """
+        if j not in self._pos[i]:
+            raise ValueError('Edge does not exist.')
+
+        self._delete(i, j)
+        if not self.directed:
+            self._delete(j, i)
+        self._log(False, i, j)
+
+    def move_edge(self, i: int, j: int, k: int) -> bool:
+        """
+        Replace the edge between i and j by one between j and k, in O(1): j drops i for k.
+        :param i: index of the node that loses the edge.
+        :param j: index of the node that keeps its end of the edge.
+        :param k: index of the node that gains the edge.
+        :return: whether the edge was moved; False, leaving the graph unchanged, if k is j or already joined to j.
+        """
+        if j not in self._pos[i]:
+            raise ValueError('Edge does not exist.')
+        if k == j or k in self._pos[j]:
+            return False
+        if k not in range(self.num_nodes):
+            raise ValueError('Index out of range.')
+
+        # Same order as remove_edge followed by add_edge, so the neighbour lists end up identical
+        self._delete(i, j)
+        if not self.directed:
+            self._delete(j, i)
+        self._insert(j, k)
+        if not self.directed:
+            self._insert(k, j)
+        self.changes += [(False, i, j), (True, j, k)]
+        self._csr = None
+        self._summary = None
+        return True
+
+    @property
+    def degrees(self) -> np.ndarray:
+        """
+        Current out-degree of every node.
+        """
+        self._sync()
+        return self._degrees
+
+    def gather(self, nodes: np.ndarray) -> np.ndarray:
+        """
+        Concatenate the current neighbour lists of several nodes, as CsrGraph.gather does.
+        Unchanged rows come from the snapshot in one vectorized gather; only changed rows are read from the lists.
+        :param nodes: array of node indices.
+        :return: an array holding the neighbours of nodes[0], then those of nodes[1], and so on.
+        """
+        self._sync()
+        if self._num_dirty > self.num_nodes // COMPACT_FRACTION:
+            self.snapshot()
+        nodes = np.asarray(nodes)
+        dirty = self._dirty[nodes]
+        if not dirty.any():
+            return self._snapshot.gather(nodes)
+        from_lists = np.repeat(dirty, self._degrees[nodes])
+        neighbors = np.empty(len(from_lists), dtype=self._snapshot.indices.dtype)
+        neighbors[~from_lists] = self._snapshot.gather(nodes[~dirty])
+        neighbors[from_lists] = self._read_lists(nodes[dirty], np.count_nonzero(from_lists))
+        return neighbors
+
+    def snapshot(self) -> CsrGraph:
+        """
+        Return a CSR snapshot of the current graph, rebuilt from the previous one.
+        Unchanged rows are moved across in one vectorized copy, and only the changed rows are read from the lists.
+        This is O(n + m) in vectorized work; gather avoids it between compactions.
+        :return: a CsrGraph, cached until the next change.
+        """
+        if self._csr is not None:
+            return self._csr
+        self._sync()
+        base = self._snapshot
+        touched = np.flatnonzero(self._dirty)
+        indptr = np.zeros(self.num_nodes + 1, dtype=np.int64)
+        np.cumsum(self._degrees, out=indptr[1:])
+
+        kept = np.repeat(~self._dirty, base.degrees)
+        # An unchanged entry moves by the change in its row's start
+        shift = np.repeat(indptr[:-1] - base.indptr[:-1], base.degrees)
+        indices = np.empty(indptr[-1], dtype=base.indices.dtype)
+        indices[np.flatnonzero(kept) + shift[kept]] = base.indices[kept]
+        from_lists = np.repeat(self._dirty, self._degrees)
+        indices[from_lists] = self._read_lists(touched, np.count_nonzero(from_lists))
+        csr = CsrGraph(indptr, indices, directed=self.directed)
+
+        self._snapshot = self._csr = csr
+        self._dirty[touched] = False
+        self._num_dirty = 0
+        self.changes = []
+        return csr
+
+    def _insert(self, i: int, j: int) -> None:
+        self._pos[i][j] = len(self.adj[i])
+        self.adj[i].append(j)
+        self._edited.add(i)
+
+    def _delete(self, i: int, j: int) -> None:
+        # Swap-remove: the last neighbour takes the place of j
+        nbrs, pos = self.adj[i], self._pos[i]
+        k = pos.pop(j)
+        last = nbrs.pop()
+        if last != j:
+            nbrs[k] = last
+            pos[last] = k
+        self._edited.add(i)
+
+    def _sync(self) -> None:
+        # Edits only touch Python containers; the arrays are brought up to date in one go when next needed
+        if self._edited:
+            rows = np.fromiter(self._edited, dtype=np.int64, count=len(self._edited))
+            self._degrees[rows] = [len(self.adj[i]) for i in rows.tolist()]
+            self._num_dirty += int(np.count_nonzero(~self._dirty[rows]))
+            self._dirty[rows] = True
+            self._edited = set()
+
+    def _read_lists(self, rows: np.ndarray, count: int) -> np.ndarray:
+        return np.fromiter(itertools.chain.from_iterable(self.adj[i] for i in rows.tolist()),
+                           dtype=self._snapshot.indices.dtype, count=int(count))
+
+    def _log(self, added: bool, i: int, j: int) -> None:
+        self.changes.append((added, i, j))
+        self._csr = None
+        self._summary = None
+
+
+class AdaptiveSirGraph(FrontierSirGraph):
+    """
+    SIR model on an adaptive network, in which susceptible nodes rewire away from infectious neighbours.
+
+    Every step, each susceptible-infectious link is first cut with probability rewire_rate, the susceptible
+    end reconnecting to a random node, and the surviving links then transmit as in FrontierSirGraph.
+    The rewiring edits the DynamicGraph in place, and the frontier's neighbours are read with DynamicGraph.gather,
+    so a step costs time in proportion to the frontier's edges and the rewirings, without rebuilding the CSR.
+    vaccinate and infected_estimate work on a snapshot of the current network; the latter does not rewire.
+    """
+
+    def __init__(self, graph: Graph | CsrGraph, prob: float = 0.0, rewire_rate: float = 0.0,
+                 rewire_to: str = 'susceptible', rng: np.random.Generator | int | None = None,
+                 record_times: bool = False):
+        """
+        :param graph: the contact network. A DynamicGraph is rewired in place; any other graph is copied into one.
+        :param prob: Initial probability of infection.
+        :param rewire_rate: probability that a susceptible node cuts a link to an infectious neighbour in a step.
+        :param rewire_to: 'susceptible' reconnects to a random susceptible node, 'random' to any node that is not
+         vaccinated.
+        :param rng: random generator or seed driving the simulation. Defaults to the shared generator, see src.tools.get_rng.
+        :param record_times: whether to record in infection_time the step at which each node became infected.
+        """
+        if graph.directed:
+            raise ValueError('Rewiring is only supported on undirected graphs.')
+        if not 0.0 <= rewire_rate <= 1.0:
+            raise ValueError('Rewiring rate must be between 0 and 1.')
+        if rewire_to not in ('susceptible', 'random'):
+            raise Exception(f'Method {rewire_to} is not supported.')
+        if not isinstance(graph, DynamicGraph):
+            graph = DynamicGraph.from_graph(graph)
+        self.rewire_rate = rewire_rate
+        self.rewire_to = rewire_to
+        self.rewirings = 0
+        super().__init__(graph, prob=prob, rng=rng, record_times=record_times)
+
+    def advance(self, rate: float) -> None:
+        """
+        Rewire the susceptible-infectious links, then advance the simulation of infection by one step.
+        :param rate: Probability of transition (probability that an infectious node
+         infects neighbors)
+        :return: None.
+        """
+        if self.rewire_rate > 0:
+            with instrument.phase('sir.rewire'):
+                self.rewire()
+        super().advance(rate)
+
+    def rewire(self) -> None:
+        """
+        Cut each susceptible-infectious link with probability rewire_rate and reconnect its susceptible end.
+        A link is left in place if the drawn partner is the node itself or already a neighbour.
+        :return: None.
+        """
+        graph = self.graph
+        sources = np.repeat(self.frontier, graph.degrees[self.frontier])
+        targets = graph.gather(self.frontier)
+        links = (self.state[targets] == self.S) & (self.rng.random(len(targets)) < self.rewire_rate)
+        sources, targets = sources[links].tolist(), targets[links].tolist()
+        if not sources:
+            return
+        partners = self._draw_partners(len(sources)).tolist()
+
+        rewired = 0
+        for infectious, susceptible, partner in zip(sources, targets, partners):
+            rewired += graph.move_edge(infectious, susceptible, partner)
+        self.rewirings += rewired
+        instrument.count('sir.rewirings', rewired)
+
+    def infected_estimate(self, rate, repeat=200):
+        self.csr = self.graph.snapshot()
+        return super().infected_estimate(rate, repeat=repeat)
+
+    def vaccinate(self, vac_rate, strategy: str = 'uniform'):
+        self.csr = self.graph.snapshot()
+        super().vaccinate(vac_rate, strategy=strategy)
+
+    def _gather(self, nodes: np.ndarray) -> np.ndarray:
+        return self.graph.gather(nodes)
+
+    def _draw_partners(self, count: int) -> np.ndarray:
+        # Uniform draws among the eligible nodes by rejection, so no O(n) list of candidates is built each step
+        susceptible_only = self.rewire_to == 'susceptible'
+        pool = self.counts[self.S] if susceptible_only else self.num_nodes - self.counts[self.V]
+        partners = []
+        while count:
+            draws = self.rng.integers(self.num_nodes, size=min(count * (self.num_nodes // pool + 1), 2 ** 22))
+            states = self.state[draws]
+            draws = draws[states == self.S if susceptible_only else states != self.V][:count]
+            partners.append(draws)
+            count -= len(draws)
+        return np.concatenate(partners)
@@ -0,0 +1,137 @@
+import numpy as np
+from src.graph.graph import Graph, SirGraph, NEVER_INFECTED
+from src.graph.csr import CsrGraph, as_csr
+from src.graph.replicas import sir_replicas
+from src.graph.vaccination import vaccination_mask
+from src.tools import check_rate, get_rng, instrument
+
+
+class FrontierSirGraph(SirGraph):
+    """
+    Vectorized engine for the same SIR model as SirGraph.
+
+    The state is a uint8 array and the infectious nodes are kept as an index array (the frontier).
+    Each step gathers the neighbours of the whole frontier from the CSR adjacency, draws one batch of
+    Bernoulli trials and applies the transitions with masked assignment.
+    """
+
+    def __init__(self, graph: Graph | CsrGraph, prob: float = 0.0, rng: np.random.Generator | int | None = None,
+                 record_times: bool = False):
+        """
+        :param graph: the contact network, either a Graph or a CsrGraph.
+        :param prob: Initial probability of infection.
+        :param rng: random generator or seed driving the simulation. Defaults to the shared generator, see src.tools.get_rng.
+        :param record_times: whether to record in infection_time the step at which each node became infected.
+        """
+        self.graph = graph
+        self.rng = get_rng(rng)
+        self.csr = as_csr(graph)
+        self.num_nodes = graph.num_nodes
+        self.directed = graph.directed
+        self.prob = prob
+        self.state_keys = [self.S,
+                           self.I,
+                           self.R,
+                           self.V] = range(4)
+
+        self.state = np.full(self.num_nodes, self.S, dtype=np.uint8)
+        self.frontier = np.zeros(0, dtype=self.csr.indices.dtype)
+        self.counts = [self.num_nodes, 0, 0, 0]
+        self.step = 0
+        self.record_times = record_times
+        self.infection_time = np.full(self.num_nodes, NEVER_INFECTED, dtype=np.int32) if record_times else None
+        if 0.0 < prob < 1.0: # Optional, initialize infection state
+            self.set_init_state(prob)
+
+    def set_init_state(self, prob: float):
+        """
+        Randomly set the initial state of infection;
+        some node being infectious, the rest being susceptible.
+
+        :param prob: Initial probability of infection.
+        :return: None
+        """
+        if not 0.0 < prob < 1.0:
+            raise ValueError('Initial probability must be between 0 and 1.')
+        infected = self.rng.random(self.num_nodes) < prob
+        self.state = np.where(infected, self.I, self.S).astype(np.uint8)
+        self.frontier = np.flatnonzero(infected).astype(self.csr.indices.dtype)
+        self.counts = [self.num_nodes - len(self.frontier), len(self.frontier), 0, 0]
+        self.step = 0
+        if self.record_times:
+            self.infection_time = np.where(infected, 0, NEVER_INFECTED).astype(np.int32)
+
+    def has_infected(self) -> bool:
+        """
+        Return True if any node is infected. O(1), as the frontier holds exactly the infectious nodes.
+        :return: Boolean.
+        """
+        return len(self.frontier) > 0
+
+    def advance(self, rate: float) -> None:
+        """
+        Advance the simulation of infection by one step, and update the state.
+        :param rate: Probability of transition (probability that an infectious node
+         infects neighbors)
+        :return: None.
+        """
+        check_rate(rate)
+        self.step += 1
+        with instrument.phase('sir.advance'):
+            self.state[self.frontier] = self.R
+            with instrument.phase('sir.traversal'):
+                targets = self._gather(self.frontier)
+            instrument.count('sir.edges_examined', len(targets))
+            with instrument.phase('sir.state_scan'):
+                # Only susceptible neighbours can change state, so trials are drawn for those alone
+                targets = targets[self.state[targets] == self.S]
+            instrument.count('sir.bernoulli_draws', len(targets))
+            with instrument.phase('sir.rng'):
+                hits = self.rng.random(len(targets)) < rate
+            with instrument.phase('sir.state_scan'):
+                targets = np.unique(targets[hits])
+                self.state[targets] = self.I
+        instrument.count('sir.steps')
+        instrument.count('sir.infections', len(targets))
+        if self.record_times:
+            self.infection_time[targets] = self.step
+        self.counts[self.S] -= len(targets)
+        self.counts[self.I] += len(targets) - len(self.frontier)
+        self.counts[self.R] += len(self.frontier)
+        self.frontier = targets
+
+    def _gather(self, nodes: np.ndarray) -> np.ndarray:
+        # Neighbours of the given nodes, concatenated; overridden by engines whose adjacency changes over time
+        return self.csr.gather(nodes)
+
+    def infected_estimate(self, rate, repeat=200):
+        """
+        Estimate the probability that each node is eventually infected, from repeated epidemics.
+        :param rate: Probability of transition (probability that an infectious node
+         infects neighbors)
+        :param repeat: Number of epidemics to simulate.
+        :return: An array of probabilities.
+        """
+        vac_mask = self.state == self.V
+        recovered_probs, _, _ = sir_replicas(self.csr, rate, self.prob, repeat=repeat, rng=self.rng,
+                                             vac_mask=vac_mask if vac_mask.any() else None)
+        return recovered_probs
+
+    def vaccinate(self, vac_rate, strategy: str = 'uniform'):
+        """
+        Vaccinate nodes, taking them out of the epidemic.
+        :param vac_rate: fraction of nodes to vaccinate, or a boolean array marking the nodes to vaccinate.
+        :param strategy: how to choose the nodes for a given fraction, see src.graph.vaccination.vaccination_mask.
+        :return: None.
+        """
+        if np.ndim(vac_rate):
+            vaccinated = np.asarray(vac_rate, dtype=bool)
+            if len(vaccinated) != self.num_nodes:
+                raise ValueError('Length of vaccination mask does not match graph.')
+        else:
+            vaccinated = vaccination_mask(self.csr, vac_rate, strategy=strategy, rng=self.rng)
+        previous = np.bincount(self.state[vaccinated], minlength=4)
+        self.counts = [count - int(prev) for count, prev in zip(self.counts, previous)]
+        self.counts[self.V] += int(np.count_nonzero(vaccinated))
+        self.state[vaccinated] = self.V
+        self.frontier = self.frontier[self.state[self.frontier] == self.I]
@@ -0,0 +1,94 @@
+import heapq
+
+import numpy as np
+from src.graph.graph import Graph, SirGraph
+from src.graph.csr import CsrGraph, as_csr
+from src.tools import get_rng
+
+S, I, R, V = range(4)
+_INFECT, _RECOVER = 0, 1
+
+
+def gillespie_sir(graph: Graph | CsrGraph | SirGraph, beta: float, gamma: float = 1.0, prob: float | None = None,
+                  t_max: float = np.inf, rng: np.random.Generator | int | None = None
+                  ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Event-driven continuous-time SIR simulation.
+    An infectious node recovers after an Exp(gamma) time and transmits along each edge after an Exp(beta) time,
+    if that comes before its recovery. Events are kept in a heap and a transmission is only queued if it beats the
+    earliest infection already queued for its target, so each event costs O(log n) and the total work is
+    proportional to the edges the epidemic actually uses.
+    :param graph: the contact network. A SirGraph also supplies the initial state, including vaccinated nodes.
+    :param beta: transmission rate per edge.
+    :param gamma: recovery rate.
+    :param prob: Initial probability of infection. Required unless a SirGraph is given; if given, it replaces
+     the SirGraph's initial state, all its nodes but the vaccinated ones starting susceptible.
+    :param t_max: time at which to stop the simulation.
+    :param rng: random generator or seed. Defaults to the SirGraph's generator, else the shared one.
+    :return: A tuple (times, S, I, R) of the trajectory, with one entry at time 0 and one after each event,
+     and the infection time of every node (0 for the initial infections, inf for nodes never infected).
+    """
+    if beta <= 0 or gamma <= 0:
+        raise ValueError('Transmission and recovery rates must be positive.')
+
+    if isinstance(graph, SirGraph):
+        rng = graph.rng if rng is None else get_rng(rng)
+        state = np.asarray(graph.state, dtype=np.uint8).copy()
+        graph = graph.graph
+    else:
+        if prob is None:
+            raise ValueError('Initial probability must be given unless a SirGraph is passed.')
+        rng = get_rng(rng)
+        state = np.full(graph.num_nodes, S, dtype=np.uint8)
+    csr = as_csr(graph)
+    if prob is not None:
+        if not 0.0 < prob < 1.0:
+            raise ValueError('Initial probability must be between 0 and 1.')
+        # A new initial infection replaces the SirGraph's, keeping only its vaccinated nodes
+        state[state != V] = S
+        state[(state == S) & (rng.random(csr.num_nodes) < prob)] = I
+
+    infection_time = np.full(csr.num_nodes, np.inf)
+    queued_time = np.full(csr.num_nodes, np.inf) # Earliest infection queued for each node
+    events = []
+    for node in np.flatnonzero(state == I).tolist():
+        infection_time[node] = 0.0
+        _infect(csr, node, 0.0, beta, gamma, t_max, state, queued_time, events, rng)
+
+    counts = np.bincount(state, minlength=4)
+    num_s, num_i, num_r = int(counts[S]), int(counts[I]), int(counts[R])
+    times, s_list, i_list, r_list = [0.0], [num_s], [num_i], [num_r]
+    while events:
+        t, kind, node = heapq.heappop(events)
+        if kind == _RECOVER:
+            state[node] = R
+            num_i -= 1
+            num_r += 1
+        elif state[node] == S and t == queued_time[node]:
+            state[node] = I
+            infection_time[node] = t
+            num_s -= 1
+            num_i += 1
+            _infect(csr, node, t, beta, gamma, t_max, state, queued_time, events, rng)
+        else: # Superseded by an earlier transmission
+            continue
+        times.append(t)
+        s_list.append(num_s)
+        i_list.append(num_i)
+        r_list.append(num_r)
+    return np.array(times), np.array(s_list), np.array(i_list), np.array(r_list), infection_time
+
+
+def _infect(csr: CsrGraph, node: int, t: float, beta: float, gamma: float, t_max: float, state: np.ndarray,
+            queued_time: np.ndarray, events: list, rng: np.random.Generator) -> None:
+    # Queue the recovery of a newly infected node and every transmission that beats both it and earlier queued ones
+    recovery = t + rng.exponential(1 / gamma)
+    if recovery < t_max:
+        heapq.heappush(events, (recovery, _RECOVER, node))
+    neighbors = csr.neighbors(node)
+    times = t + rng.exponential(1 / beta, size=len(neighbors))
+    hit = (times < min(recovery, t_max)) & (state[neighbors] == S) & (times < queued_time[neighbors])
+    for target, time in zip(neighbors[hit].tolist(), times[hit].tolist()):
+        if time < queued_time[target]: # Repeated neighbours of a multi-edge
+            queued_time[target] = time
+            heapq.heappush(events, (time, _INFECT, target))
@@ -1,5 +1,8 @@
 import numpy as np
-from src.tools import check_rate
+from src.tools import check_rate, get_rng, instrument
+
+NEVER_INFECTED = -1 # Infection time recorded for nodes that are never infected
+
 
 class Graph(object):
     def __init__(self, num_nodes: int, directed=False):
@@ -15,6 +18,8 @@ class Graph(object):
         # is a list of neighbors of a node
         self.adj = [list() for _ in range(self.num_nodes)]
         self.directed = directed
+        self._csr = None # Cached CSR conversion, see src.graph.csr.as_csr
+        self._summary = None # Cached statistics, see src.graph_methods.summary.summarize
 
     def add_edge(self, i: int, j: int) -> None:
         """
@@ -28,6 +33,8 @@ class Graph(object):
         self.adj[i].append(j)
         if not self.directed:
             self.adj[j].append(i)
+        self._csr = None
+        self._summary = None
 
     def neighbors(self, i: int) -> np.array:
         """
@@ -54,11 +61,18 @@ class SirGraph(object):
         2: 'Recovered',
     }
 
-    def __init__(self, graph: Graph, prob: float = 0.0):
+    def __init__(self, graph: Graph, prob: float = 0.0, rng: np.random.Generator | int | None = None,
+                 record_times: bool = False):
+        """
+        :param graph: the contact network, either a Graph or a CsrGraph.
+        :param prob: Initial probability of infection.
+        :param rng: random generator or seed driving the simulation. Defaults to the shared generator, see src.tools.get_rng.
+        :param record_times: whether to record in infection_time the step at which each node became infected.
+        """
         self.graph = graph
+        self.rng = get_rng(rng)
         self.num_nodes = graph.num_nodes
         self.directed = graph.directed
-        self.adj = self.graph.adj
         self.prob = prob
         self.state_keys = [self.S,
                            self.I,
@@ -67,6 +81,11 @@ class SirGraph(object):
 
         self.state = [self.S for _ in range(self.num_nodes)]
         self.i_list = []
+        # Number of nodes in each state, indexed by state key and kept up to date by every transition
+        self.counts = [self.num_nodes, 0, 0, 0]
+        self.step = 0
+        self.record_times = record_times
+        self.infection_time = np.full(self.num_nodes, NEVER_INFECTED, dtype=np.int32) if record_times else None
         if 0.0 < prob < 1.0: # Optional, initialize infection state
             self.set_init_state(prob)
 
@@ -82,19 +101,23 @@ class SirGraph(object):
             raise ValueError('Initial probability must be between 0 and 1.')
         self.state = [self.S for _ in range(self.num_nodes)]
         self.i_list = []
-        rng = np.random.default_rng()
-        binom = rng.binomial(n=1, p=prob, size=self.num_nodes)
+        binom = self.rng.binomial(n=1, p=prob, size=self.num_nodes)
         for i in range(self.num_nodes):
             if binom[i] == 1:
                 self.state[i] = self.I
                 self.i_list.append(i)
+        self.counts = [self.num_nodes - len(self.i_list), len(self.i_list), 0, 0]
+        self.step = 0
+        if self.record_times:
+            self.infection_time = np.full(self.num_nodes, NEVER_INFECTED, dtype=np.int32)
+            self.infection_time[self.i_list] = 0
 
     def has_infected(self) -> bool:
         """
         Return True if any node is infected.
         :return: Boolean.
         """
-        return self.I in self.state
+        return self.counts[self.I] > 0
 
     def advance(self, rate: float) -> None:
         """
@@ -104,51 +127,101 @@ class SirGraph(object):
         :return: None.
         """
         check_rate(rate)
-        next_state = self.state
-        for node in self.i_list:
-            if self.state[node] != self.I:
-                raise ValueError("Unmatched state and infectious state.")
-            self.i_list.remove(node)
-            next_state[node] = self.R
-            infection_list = np.random.binomial(n=1, p=rate, size=len(self.adj[node]))
-            for i, friend in enumerate(self.adj[node]):
-                if self.state[friend] == self.S and infection_list[i]:
-                    next_state[friend] = self.I
-                    self.i_list.append(friend)
-        self.state = next_state
-
-    def run(self, rate):
+        self.step += 1
+        examined = infected = 0
+        with instrument.phase('sir.advance'):
+            next_state = self.state
+            for node in self.i_list:
+                if self.state[node] != self.I:
+                    raise ValueError("Unmatched state and infectious state.")
+                self.i_list.remove(node)
+                next_state[node] = self.R
+                self.counts[self.I] -= 1
+                self.counts[self.R] += 1
+                neighbors = self.graph.neighbors(node)
+                infection_list = self.rng.binomial(n=1, p=rate, size=len(neighbors))
+                examined += len(neighbors)
+                for i, friend in enumerate(neighbors):
+                    if self.state[friend] == self.S and infection_list[i]:
+                        next_state[friend] = self.I
+                        self.i_list.append(friend)
+                        self.counts[self.S] -= 1
+                        self.counts[self.I] += 1
+                        infected += 1
+                        if self.record_times:
+                            self.infection_time[friend] = self.step
+            self.state = next_state
+        instrument.count('sir.steps')
+        instrument.count('sir.edges_examined', examined)
+        instrument.count('sir.bernoulli_draws', examined)
+        instrument.count('sir.infections', infected)
+
+    def run(self, rate, observers: list | None = None):
         """
         Run the simulation of infection until it reaches steady state.
         :param rate: Probability of transition (probability that an infectious node
          infects neighbors)
+        :param observers: Observers (see src.graph.observers) receiving the state counts of every step.
         :return: A pair of (final state, time taken to reach steady state).
         """
+        observers = observers or []
+        transient_time, counts = 0, None
+        with instrument.phase('sir.run'):
+            for transient_time, counts in self.run_iter(rate):
+                for observer in observers:
+                    observer.observe(transient_time, counts)
+            for observer in observers:
+                observer.finish(transient_time, counts)
+        instrument.count('sir.runs')
+        return self.state, transient_time
+
+    def run_iter(self, rate):
+        """
+        Run the simulation of infection step by step, as a generator.
+        :param rate: Probability of transition (probability that an infectious node
+         infects neighbors)
+        :return: Yields (step, (S, I, R, V) counts) for the initial state and after every step, in O(1) per step.
+        """
         check_rate(rate)
-        transient_time = 0
-        while self.I in self.state:
+        step = 0
+        yield step, tuple(self.counts)
+        while self.counts[self.I]:
             self.advance(rate)
-            transient_time += 1
-            # print(f"Run {transient_time}, Infectious: {self.state.count(self.I)}, Recovered: {self.state.count(self.R)}")
-        return self.state, transient_time
+            step += 1
+            yield step, tuple(self.counts)
 
     def infected_estimate(self, rate, repeat=200):
-        recovered_list = [0 for _ in range(self.num_nodes)]
-        for _ in range(repeat):
-            self.set_init_state(self.prob)
-            res_state, _ = self.run(rate)
-            for i, item in enumerate(res_state):
-                inc = 1 if item == self.R else 0
-                recovered_list[i] += inc
-            if len(recovered_list) > self.num_nodes:
-                raise ValueError("Length of recovered list exceeds number of nodes.")
-        for i in range(self.num_nodes):
-            recovered_list[i] /= repeat
-        return recovered_list
+        """
+        Estimate the probability that each node is eventually infected, from repeated epidemics.
+        The repeats are simulated together by src.graph.replicas.sir_replicas, with the vaccinated nodes
+        of the current state kept out of every epidemic.
+        :param rate: Probability of transition (probability that an infectious node
+         infects neighbors)
+        :param repeat: Number of epidemics to simulate.
+        :return: A list of probabilities.
+        """
+        from src.graph.replicas import sir_replicas
+        vac_mask = np.asarray(self.state) == self.V
+        recovered_probs, _, _ = sir_replicas(self.graph, rate, self.prob, repeat=repeat, rng=self.rng,
+                                             vac_mask=vac_mask if vac_mask.any() else None)
+        return recovered_probs.tolist()
 
-    def vaccinate(self, vac_rate):
-        rng = np.random.default_rng()
-        binom = rng.binomial(n=1, p=vac_rate, size=self.num_nodes)
-        for i in range(self.num_nodes):
-            if binom[i] == 1:
-                self.state[i] = self.V
+    def vaccinate(self, vac_rate, strategy: str = 'uniform'):
+        """
+        Vaccinate nodes, taking them out of the epidemic.
+        :param vac_rate: fraction of nodes to vaccinate, or a boolean array marking the nodes to vaccinate.
+        :param strategy: how to choose the nodes for a given fraction, see src.graph.vaccination.vaccination_mask.
+        :return: None.
+        """
+        from src.graph.vaccination import vaccination_mask
+        if np.ndim(vac_rate):
+            vaccinated = np.asarray(vac_rate, dtype=bool)
+            if len(vaccinated) != self.num_nodes:
+                raise ValueError('Length of vaccination mask does not match graph.')
+        else:
+            vaccinated = vaccination_mask(self.graph, vac_rate, strategy=strategy, rng=self.rng)
+        for i in np.flatnonzero(vaccinated).tolist():
+            self.counts[self.state[i]] -= 1
+            self.counts[self.V] += 1
+            self.state[i] = self.V
+        self.i_list = [i for i in self.i_list if self.state[i] == self.I]
@@ -0,0 +1,98 @@
+from pathlib import Path
+
+import numpy as np
+
+
+class Observer(object):
+    """
+    Receives per-step compartment counts from SirGraph.run.
+    Subclasses override observe, and finish if they need to see the final step.
+    """
+
+    def observe(self, step: int, counts: tuple[int, int, int, int]) -> None:
+        """
+        :param step: number of steps simulated so far; 0 for the initial state.
+        :param counts: numbers of (susceptible, infectious, recovered, vaccinated) nodes.
+        """
+        raise NotImplementedError
+
+    def finish(self, step: int, counts: tuple[int, int, int, int]) -> None:
+        """
+        Called once when the run reaches steady state, with the final step.
+        """
+
+
+class ArrayObserver(Observer):
+    """
+    Keeps every snapshot in memory.
+    """
+
+    def __init__(self):
+        self.steps = []
+        self.counts = []
+
+    def observe(self, step, counts):
+        self.steps.append(step)
+        self.counts.append(counts)
+
+    def as_array(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        :return: A pair of arrays (steps, counts), counts having one (S, I, R, V) row per step.
+        """
+        return np.array(self.steps), np.array(self.counts).reshape(-1, 4)
+
+
+class DecimatedObserver(Observer):
+    """
+    Forwards every k-th snapshot to another observer, plus the final one.
+    """
+
+    def __init__(self, observer: Observer, every: int):
+        """
+        :param observer: the observer to forward to.
+        :param every: forward steps that are a multiple of this.
+        """
+        if every < 1:
+            raise ValueError('Decimation interval must be positive.')
+        self.observer = observer
+        self.every = every
+        self._last = None
+
+    def observe(self, step, counts):
+        if step % self.every == 0:
+            self.observer.observe(step, counts)
+            self._last = step
+
+    def finish(self, step, counts):
+        if self._last != step:
+            self.observer.observe(step, counts)
+        self.observer.finish(step, counts)
+
+
+class FileObserver(Observer):
+    """
+    Appends one CSV line 'step,S,I,R,V' per snapshot to a file, so long runs can be streamed to disk.
+    """
+
+    def __init__(self, path: str | Path):
+        """
+        :param path: file to append to; a header line is written if it is new or empty.
+        """
+        self.file = open(path, 'a')
+        if self.file.tell() == 0:
+            self.file.write('step,S,I,R,V\n')
+
+    def observe(self, step, counts):
+        self.file.write(f'{step},{counts[0]},{counts[1]},{counts[2]},{counts[3]}\n')
+
+    def finish(self, step, counts):
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
\ No newline at end of file
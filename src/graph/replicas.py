@@ -0,0 +1,106 @@
+import numpy as np
+from src.graph.graph import Graph, NEVER_INFECTED
+from src.graph.csr import CsrGraph, as_csr
+from src.tools import check_rate, get_rng
+
+S, I, R, V = 0, 1, 2, 3
+CHUNK_ENTRIES = 2 ** 21 # Adjacency entries gathered at once, bounding the per-step temporaries
+BATCH_BYTES = 2 ** 28 # Target peak memory of a batch
+# Worst-case bytes per (replica, node): the uint8 state plus the int64 frontier, its divmod, the degree lookup
+# and cumsum and the next frontier, when nearly every node is infected at once
+BYTES_PER_NODE = 48
+
+
+def sir_replicas(graph: Graph | CsrGraph, rate: float, prob: float, repeat: int = 200,
+                 batch_size: int | None = None, rng: np.random.Generator | int | None = None,
+                 record_times: bool = False, vac_mask: np.ndarray | None = None,
+                 counts: bool = False) -> tuple[np.ndarray, ...]:
+    """
+    Run independent SIR epidemics on a shared graph, advancing a whole batch of replicas in lock step.
+    The state of a batch is a (replicas, nodes) uint8 array, and the infectious nodes of all replicas
+    form one frontier of flat indices, so each step is a single CSR gather and Bernoulli draw.
+    :param graph: the contact network, either a Graph or a CsrGraph.
+    :param rate: Probability of transition (probability that an infectious node infects neighbors).
+    :param prob: Initial probability of infection.
+    :param repeat: number of replicas.
+    :param batch_size: number of replicas simulated at once. Defaults to as many as keep the peak memory of a
+     batch within about BATCH_BYTES, counting the frontier arrays at their worst case.
+    :param rng: random generator or seed. Defaults to the shared generator, see src.tools.get_rng.
+    :param record_times: whether to also return the step at which each node became infected in each replica.
+    :param vac_mask: Boolean array marking vaccinated nodes, which are never infected. Their edges are cut from
+     the adjacency up front, see CsrGraph.drop_nodes, so the simulation never visits them.
+    :param counts: whether to return, in place of the probabilities, the int64 number of replicas in which each
+     node ends up recovered, e.g. to add up results over chunks of replicas.
+    :return: a tuple of (probability that each node ends up recovered, final recovered count of each replica,
+     number of steps each replica took to reach steady state), followed if record_times is set by an int32
+     (replicas, nodes) array of infection steps, NEVER_INFECTED for nodes that were not infected.
+    """
+    check_rate(rate)
+    if not 0.0 < prob < 1.0:
+        raise ValueError('Initial probability must be between 0 and 1.')
+    csr = as_csr(graph)
+    n = csr.num_nodes
+    if batch_size is None:
+        batch_size = max(1, BATCH_BYTES // (BYTES_PER_NODE * n))
+    if vac_mask is not None:
+        vac_mask = np.asarray(vac_mask, dtype=bool)
+        if len(vac_mask) != n:
+            raise ValueError('Length of vaccination mask does not match graph.')
+        csr = csr.drop_nodes(vac_mask)
+
+    recovered = np.zeros(n, dtype=np.int64)
+    final_sizes = np.zeros(repeat, dtype=np.int64)
+    durations = np.zeros(repeat, dtype=np.int64)
+    infection_time = np.full((repeat, n), NEVER_INFECTED, dtype=np.int32) if record_times else None
+    rng = get_rng(rng)
+    for start in range(0, repeat, batch_size):
+        stop = min(start + batch_size, repeat)
+        times = infection_time[start:stop] if record_times else None
+        state = _run_batch(csr, rate, prob, stop - start, durations[start:stop], rng, times, vac_mask)
+        is_recovered = state == R
+        recovered += is_recovered.sum(axis=0)
+        final_sizes[start:stop] = is_recovered.sum(axis=1)
+    recovered = recovered if counts else recovered / repeat
+    if record_times:
+        return recovered, final_sizes, durations, infection_time
+    return recovered, final_sizes, durations
+
+
+def _run_batch(csr: CsrGraph, rate: float, prob: float, replicas: int, durations: np.ndarray,
+               rng: np.random.Generator, infection_time: np.ndarray | None = None,
+               vac_mask: np.ndarray | None = None) -> np.ndarray:
+    # Simulate one batch to completion, counting steps into durations and optionally recording
+    # infection steps; returns the final state
+    n = csr.num_nodes
+    # Initial infections are drawn one replica at a time, so no (replicas, nodes) float array is allocated;
+    # this consumes the generator exactly as a single (replicas, nodes) draw would
+    state = np.empty((replicas, n), dtype=np.uint8)
+    for row in state:
+        np.less(rng.random(n), prob, out=row, casting='unsafe') # 1 = I for the infected, 0 = S for the rest
+    if vac_mask is not None:
+        state[:, vac_mask] = V
+    flat_state = state.reshape(-1)
+    frontier = np.flatnonzero(flat_state == I)
+    if infection_time is not None:
+        flat_time = infection_time.reshape(-1)
+        flat_time[frontier] = 0
+    step = 0
+    while len(frontier):
+        step += 1
+        rows, nodes = np.divmod(frontier, n)
+        durations += np.bincount(rows, minlength=replicas) > 0
+        flat_state[frontier] = R
+        # Nodes infected by an earlier chunk are no longer susceptible, so later chunks cannot infect them again
+        ends = np.cumsum(csr.degrees[nodes])
+        cuts = np.searchsorted(ends, np.arange(CHUNK_ENTRIES, ends[-1], CHUNK_ENTRIES), side='right')
+        infected = []
+        for chunk_rows, chunk_nodes in zip(np.split(rows, cuts), np.split(nodes, cuts)):
+            targets = csr.gather(chunk_nodes) + np.repeat(chunk_rows * n, csr.degrees[chunk_nodes])
+            targets = targets[flat_state[targets] == S]
+            targets = np.unique(targets[rng.random(len(targets)) < rate])
+            flat_state[targets] = I
+            infected.append(targets)
+        frontier = infected[0] if len(infected) == 1 else np.concatenate(infected)
+        if infection_time is not None:
+            flat_time[frontier] = step
+    return state
@@ -0,0 +1,99 @@
+import numpy as np
+from src.graph.graph import Graph
+from src.graph.csr import CsrGraph, as_csr
+from src.tools import get_rng
+
+STRATEGIES = ['uniform', 'degree', 'acquaintance']
+NOMINATION_ROUNDS = 8 # Batches of nominations drawn by acquaintance_vaccination before it picks the rest directly
+
+
+def vaccination_mask(graph: Graph | CsrGraph, coverage: float, strategy: str = 'uniform',
+                     rng: np.random.Generator | int | None = None) -> np.ndarray:
+    """
+    Choose nodes to vaccinate.
+    :param graph: the graph.
+    :param coverage: fraction of nodes to vaccinate.
+    :param strategy: 'uniform' vaccinates each node independently with probability coverage.
+     'degree' vaccinates the round(coverage * num_nodes) nodes of highest degree, breaking ties at random.
+     'acquaintance' asks random nodes to name a random friend and vaccinates the friends named, until
+     round(coverage * num_nodes) distinct nodes are reached; through the friendship paradox this favours hubs
+     without knowing the degrees.
+    :param rng: random generator or seed. Defaults to the shared generator, see src.tools.get_rng.
+    :return: A boolean array marking the vaccinated nodes.
+    """
+    if not 0.0 <= coverage <= 1.0:
+        raise ValueError('Vaccination coverage must be between 0 and 1.')
+    rng = get_rng(rng)
+    if strategy == 'uniform':
+        return rng.random(graph.num_nodes) < coverage
+    elif strategy == 'degree':
+        return degree_vaccination(graph, round(coverage * graph.num_nodes), rng=rng)
+    elif strategy == 'acquaintance':
+        return acquaintance_vaccination(graph, round(coverage * graph.num_nodes), rng=rng)
+    else:
+        raise Exception(f'Method {strategy} is not supported.')
+
+
+def degree_vaccination(graph: Graph | CsrGraph, count: int,
+                       rng: np.random.Generator | int | None = None) -> np.ndarray:
+    """
+    Vaccinate the nodes of highest degree.
+    :param graph: the graph.
+    :param count: number of nodes to vaccinate.
+    :param rng: random generator or seed used to break ties between equal degrees.
+    :return: A boolean array marking the vaccinated nodes.
+    """
+    csr = as_csr(graph)
+    count = min(max(count, 0), csr.num_nodes)
+    mask = np.zeros(csr.num_nodes, dtype=bool)
+    if count:
+        order = np.lexsort((get_rng(rng).random(csr.num_nodes), -csr.degrees))
+        mask[order[:count]] = True
+    return mask
+
+
+def acquaintance_vaccination(graph: Graph | CsrGraph, count: int,
+                             rng: np.random.Generator | int | None = None) -> np.ndarray:
+    """
+    Acquaintance vaccination: vaccinate a random friend of each of a series of random nodes.
+    Nominations are drawn in batches; the first count distinct nodes named are vaccinated. If NOMINATION_ROUNDS
+    batches fall short, the rest are drawn directly with the probabilities the nominations would give them.
+    :param graph: the graph.
+    :param count: number of distinct nodes to vaccinate. At most the number of nodes that someone names as a friend
+     can be reached; in a directed graph, those with an incoming edge.
+    :param rng: random generator or seed.
+    :return: A boolean array marking the vaccinated nodes.
+    """
+    csr = as_csr(graph)
+    rng = get_rng(rng)
+    degrees = csr.degrees
+    candidates = np.flatnonzero(degrees)
+    if csr.directed:
+        nameable = int(np.count_nonzero(np.bincount(csr.indices, minlength=csr.num_nodes)))
+    else:
+        nameable = len(candidates)
+    count = min(max(count, 0), nameable)
+    mask = np.zeros(csr.num_nodes, dtype=bool)
+    remaining = count
+    for _ in range(NOMINATION_ROUNDS):
+        if remaining == 0:
+            return mask
+        # Twice the shortfall per batch, since later nominations increasingly repeat earlier ones
+        nominators = candidates[rng.integers(len(candidates), size=2 * remaining)]
+        entries = csr.indptr[nominators] + (rng.random(len(nominators)) * degrees[nominators]).astype(np.int64)
+        named = csr.indices[entries]
+        named = named[~mask[named]]
+        _, first = np.unique(named, return_index=True)
+        named = named[np.sort(first)[:remaining]]
+        mask[named] = True
+        remaining -= len(named)
+    if remaining:
+        # Nominations hit vaccinated nodes too often to go on, e.g. the hub of a star. Each nomination names node j
+        # with probability q_j, so the distinct nodes named next are a sample without replacement in proportion to
+        # q, drawn directly as the smallest Exp(1) / q_j keys (Efraimidis-Spirakis)
+        weights = np.bincount(csr.indices, weights=np.repeat(1 / np.maximum(degrees, 1), degrees),
+                              minlength=csr.num_nodes)
+        open_nodes = np.flatnonzero((weights > 0) & ~mask)
+        keys = rng.exponential(size=len(open_nodes)) / weights[open_nodes]
+        mask[open_nodes[np.argpartition(keys, remaining - 1)[:remaining]]] = True
+    return mask
\ No newline at end of file
@@ -1,2 +1,5 @@
 from .graph_gen import *
-from .graph_stats import *
\ No newline at end of file
+from .graph_stats import *
+from .friendship import *
+from .summary import *
+from .traversal import *
\ No newline at end of file
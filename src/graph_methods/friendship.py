@@ -0,0 +1,87 @@
+import numpy as np
+from src.graph import Graph, CsrGraph, as_csr
+from src.tools import get_rng
+
+
+def neighbor_mean(graph: Graph | CsrGraph, values: np.ndarray) -> np.ndarray:
+    """
+    Average a node quantity over the neighbours of every node, with one np.add.reduceat over the CSR rows.
+    :param graph: the graph.
+    :param values: one value per node.
+    :return: An array of the mean value of the neighbours of each node, nan for isolated nodes.
+
+    Isolated nodes, including trailing ones, leave the other rows intact:
+
+    >>> neighbor_mean(CsrGraph.from_edges(4, [[0, 2], [1, 2]]), [10, 20, 30, 40]).tolist()
+    [30.0, 30.0, 15.0, nan]
+    """
+    csr = as_csr(graph)
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) != csr.num_nodes:
+        raise ValueError('Length of values does not match graph.')
+
+    degrees = csr.degrees
+    means = np.full(csr.num_nodes, np.nan)
+    has_friends = degrees > 0
+    if csr.num_entries:
+        # The starts of non-empty rows are strictly increasing and in range, as reduceat requires
+        sums = np.add.reduceat(values[csr.indices], csr.indptr[:-1][has_friends])
+        means[has_friends] = sums / degrees[has_friends]
+    return means
+
+
+def friends_degree(graph: Graph | CsrGraph) -> np.ndarray:
+    """
+    Mean degree of the friends of every node.
+    :param graph: the graph.
+    :return: An array of the average friend degree of each node, nan for isolated nodes.
+    """
+    return neighbor_mean(graph, as_csr(graph).degrees)
+
+
+def sample_friend_degrees(graph: Graph | CsrGraph, size: int, mode: str = 'node',
+                          rng: np.random.Generator | int | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Sample pairs of a node and one of its friends, drawing all nodes and friends at once.
+    :param graph: the graph.
+    :param size: number of pairs.
+    :param mode: 'node' picks a uniformly random node with at least one friend, then a uniformly random friend.
+     'edge' picks a uniformly random edge and one of its ends, so both ends are sampled in proportion to degree.
+    :param rng: random generator or seed. Defaults to the shared generator, see src.tools.get_rng.
+    :return: A pair of arrays (degree of each sampled node, degree of its sampled friend).
+    """
+    csr = as_csr(graph)
+    if csr.num_entries == 0:
+        raise ValueError('Graph has no edges to sample friends from.')
+    rng = get_rng(rng)
+    degrees = csr.degrees
+
+    if mode == 'node':
+        candidates = np.flatnonzero(degrees)
+        nodes = candidates[rng.integers(len(candidates), size=size)]
+        entries = csr.indptr[nodes] + (rng.random(size) * degrees[nodes]).astype(np.int64)
+    elif mode == 'edge':
+        entries = rng.integers(csr.num_entries, size=size)
+        nodes = np.searchsorted(csr.indptr, entries, side='right') - 1
+    else:
+        raise Exception(f'Method {mode} is not supported.')
+    return degrees[nodes], degrees[csr.indices[entries]]
+
+
+def friendship_paradox(graph: Graph | CsrGraph) -> dict:
+    """
+    Summarise the friendship paradox of a graph exactly, without sampling.
+    :param graph: the graph.
+    :return: A dict with the mean degree, the mean degree of a random friend (<k^2>/<k>), the mean over nodes of
+     their friends' average degree, and the fraction of nodes whose friends have more friends on average than they do.
+    """
+    csr = as_csr(graph)
+    degrees = csr.degrees.astype(np.float64)
+    friends = friends_degree(csr)
+    has_friends = degrees > 0
+    return {
+        'mean_degree': float(degrees.mean()),
+        'mean_friend_degree': float((degrees ** 2).sum() / degrees.sum()) if csr.num_entries else np.nan,
+        'mean_friends_average': float(friends[has_friends].mean()) if has_friends.any() else np.nan,
+        'paradox_fraction': float(np.mean(friends[has_friends] > degrees[has_friends])) if has_friends.any() else np.nan,
+    }
\ No newline at end of file
@@ -1,76 +1,363 @@
 import numpy as np
 
-from src.graph import Graph
+from src.graph import Graph, CsrGraph
 from src.tools import *
+from src.tools import instrument
 
-def configuration_model(num_nodes: int, deg: float, dist: str) -> np.ndarray:
+def configuration_model(num_nodes: int, deg: float, dist: str, simple: bool = False, exponent: float = 2.5,
+                        directed: bool = False, rng: np.random.Generator | int | None = None) -> np.ndarray:
     """
     Generates a list of edges by matching each node with the degree distribution.
+    All degrees are drawn in one call, stubs are expanded with np.repeat and paired after a shuffle.
     :param num_nodes: number of nodes of the graph.
     :param deg: mean degree of each node.
-    :param dist: the type of degree distribution to use.
-    :return: a list of dimension (something, 2) representing all pairs of edges of the graph.
+    :param dist: the type of degree distribution to use: 'geometric', 'poisson' or 'power-law'.
+    :param simple: whether to erase self-loops and multi-edges from the matching.
+    :param exponent: exponent of the 'power-law' distribution, see power_law_degrees.
+    :param directed: whether the pairs are read as (source, target), so that simplifying keeps (i, j) and (j, i)
+     apart and each edge keeps its random orientation.
+    :param rng: random generator or seed. Defaults to the shared generator, see src.tools.get_rng.
+    :return: an array of dimension (something, 2) representing all pairs of edges of the graph.
     """
-
+    rng = get_rng(rng)
     if dist == 'geometric':
         p_geom = 1 / deg
-        samples = [geometric_sample(p=p_geom) for _ in range(num_nodes)]
+        if p_geom < 0 or p_geom > 1:
+            raise ValueError('Geometric probability must be between 0 and 1.')
+        degrees = geometric_sample(p=p_geom, size=num_nodes, rng=rng)
     elif dist == 'poisson':
-        samples = [poisson_sample(deg) for _ in range(num_nodes)]
+        degrees = poisson_sample(deg, size=num_nodes, rng=rng)
+    elif dist == 'power-law':
+        degrees = np.rint(power_law_degrees(num_nodes, deg, exponent, rng=rng)).astype(np.int64)
     else:
         raise Exception(f'Distribution {dist} not supported.')
-    index = np.array([i for i in range(num_nodes) for _ in range(samples[i])])
-    index = np.random.permutation(index)
+    dtype = np.int32 if num_nodes <= np.iinfo(np.int32).max else np.int64
+    index = np.repeat(np.arange(num_nodes, dtype=dtype), degrees)
+    rng.shuffle(index)
     if len(index) % 2 == 1:
         index = index[:-1]
     index = np.reshape(index, (-1, 2))
+    if simple:
+        index = simplify_edges(index, num_nodes, directed=directed)
     return index
 
 
-def random_graph(num_nodes: int, p: float = 0.0, deg: float = 0.0, method: str = 'naive', directed: bool = False) -> Graph:
+def simplify_edges(edges: np.ndarray, num_nodes: int, directed: bool = False) -> np.ndarray:
+    """
+    Erase self-loops and multi-edges from an edge array in one vectorized pass.
+    Edges are packed into int64 keys, which are sorted and deduplicated.
+    :param edges: array of dimension (something, 2) of edges.
+    :param num_nodes: number of nodes of the graph.
+    :param directed: whether (i, j) and (j, i) are different edges.
+    :return: the sorted array of distinct edges; for undirected graphs each edge is given as (smaller, larger).
+    """
+    edges = np.asarray(edges).reshape(-1, 2)
+    src = edges[:, 0].astype(np.int64)
+    dst = edges[:, 1].astype(np.int64)
+    loops = src == dst
+    if not directed:
+        src, dst = np.minimum(src, dst), np.maximum(src, dst, out=dst)
+    keys = src
+    keys *= num_nodes
+    keys += dst
+    del dst
+    keys = keys[~loops]
+    keys.sort()
+    keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+    return np.stack((keys // num_nodes, keys % num_nodes), axis=1).astype(edges.dtype, copy=False)
+
+
+def power_law_degrees(num_nodes: int, deg: float, exponent: float = 2.5,
+                      rng: np.random.Generator | int | None = None) -> np.ndarray:
+    """
+    Sample heavy-tailed (expected) degrees from a Pareto distribution, P(k) ~ k^-exponent for k above a minimum
+    chosen to give the requested mean, truncated at num_nodes - 1.
+    :param num_nodes: number of nodes of the graph.
+    :param deg: mean degree, before truncation.
+    :param exponent: exponent of the power law, greater than 2 so that the mean is finite.
+    :param rng: random generator or seed. Defaults to the shared generator, see src.tools.get_rng.
+    :return: a float array of one degree per node.
+    """
+    if exponent <= 2:
+        raise ValueError('Power-law exponent must be greater than 2.')
+    if deg <= 0:
+        raise ValueError('Degree of nodes must be positive.')
+    min_degree = deg * (exponent - 2) / (exponent - 1)
+    # Inverse transform sampling of the Pareto tail
+    degrees = min_degree * get_rng(rng).random(num_nodes) ** (-1 / (exponent - 1))
+    return np.minimum(degrees, num_nodes - 1)
+
+
+def chung_lu_edges(weights: np.ndarray, rng: np.random.Generator | int | None = None) -> np.ndarray:
+    """
+    Generates a Chung-Lu graph, in which node i has expected degree weights[i], in O(n + m) time.
+    The edge count is drawn from a Poisson distribution with mean sum(weights) / 2, the number of edge ends at each
+    node from a multinomial in proportion to the weights, and the ends are paired at random, which gives each edge
+    two independent endpoints. Self-loops and multi-edges are erased, see simplify_edges.
+    :param weights: expected degree of each node.
+    :param rng: random generator or seed. Defaults to the shared generator, see src.tools.get_rng.
+    :return: an array of dimension (something, 2) of distinct edges.
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    if np.any(weights < 0):
+        raise ValueError('Expected degrees must not be negative.')
+    rng = get_rng(rng)
+    num_nodes = len(weights)
+    total = weights.sum()
+    if total == 0:
+        return np.zeros((0, 2), dtype=np.int32)
+    num_edges = rng.poisson(total / 2)
+    dtype = np.int32 if num_nodes <= np.iinfo(np.int32).max else np.int64
+    nodes = np.arange(num_nodes, dtype=dtype)
+    ends = np.empty((num_edges, 2), dtype=dtype)
+    for side in range(2):
+        ends[:, side] = np.repeat(nodes, rng.multinomial(num_edges, weights / total))
+    rng.shuffle(ends[:, 1])
+    return simplify_edges(ends, num_nodes)
+
+
+def barabasi_albert_edges(num_nodes: int, m: int, rng: np.random.Generator | int | None = None) -> np.ndarray:
+    """
+    Generates a Barabasi-Albert preferential attachment graph, in which each new node attaches m edges.
+    Uses the repeated-nodes array of Batagelj and Brandes: slot 2k holds the node adding edge k and slot 2k + 1
+    a copy of a uniformly chosen earlier slot, so a node is picked in proportion to its degree. All choices are
+    drawn at once, and copies of copies are resolved by vectorized pointer jumping, in O(log) rounds.
+    Self-loops and multi-edges drawn this way are erased, see simplify_edges.
+    :param num_nodes: number of nodes of the graph.
+    :param m: number of edges added by each node.
+    :param rng: random generator or seed. Defaults to the shared generator, see src.tools.get_rng.
+    :return: an array of dimension (something, 2) of distinct edges.
+    """
+    if m < 1:
+        raise ValueError('Number of edges per node must be positive.')
+    rng = get_rng(rng)
+    num_edges = num_nodes * m
+    slots = np.arange(1, 2 * num_edges, 2, dtype=np.int64)
+    # Slot 2k + 1 copies a uniform slot among 0, ..., 2k
+    pointers = (rng.random(num_edges) * slots).astype(np.int64)
+    odd = np.flatnonzero(pointers & 1)
+    while len(odd):
+        pointers[odd] = pointers[pointers[odd] >> 1]
+        odd = odd[pointers[odd] & 1 == 1]
+    dtype = np.int32 if num_nodes <= np.iinfo(np.int32).max else np.int64
+    sources = (np.arange(num_edges, dtype=np.int64) // m).astype(dtype)
+    # An even slot 2k holds the node adding edge k
+    targets = ((pointers >> 1) // m).astype(dtype)
+    return simplify_edges(np.stack((sources, targets), axis=1), num_nodes)
+
+
+def watts_strogatz_edges(num_nodes: int, k: int, beta: float,
+                         rng: np.random.Generator | int | None = None) -> np.ndarray:
+    """
+    Generates a Watts-Strogatz small-world graph: a ring in which each node is joined to its k nearest
+    neighbours, with the far end of each edge rewired to a uniform node with probability beta.
+    Rewiring is done in batches: all moves are proposed at once, and those that would create a self-loop or
+    repeat an existing edge are proposed again, until none are left. As in networkx, an edge whose source is
+    already joined to every other node has nowhere to go and is left in place.
+    :param num_nodes: number of nodes of the graph.
+    :param k: even number of ring neighbours of each node.
+    :param beta: rewiring probability.
+    :param rng: random generator or seed. Defaults to the shared generator, see src.tools.get_rng.
+    :return: an array of dimension (something, 2) of distinct edges.
+    """
+    if k < 2 or k % 2 == 1 or k >= num_nodes:
+        raise ValueError('Number of ring neighbours must be even, positive and less than the number of nodes.')
+    if beta < 0 or beta > 1:
+        raise ValueError('Rewiring probability must be between 0 and 1.')
+    rng = get_rng(rng)
+    sources = np.repeat(np.arange(num_nodes, dtype=np.int64), k // 2)
+    targets = (sources + np.tile(np.arange(1, k // 2 + 1), num_nodes)) % num_nodes
+    pending = np.flatnonzero(rng.random(len(sources)) < beta)
+    while len(pending):
+        degrees = np.bincount(sources, minlength=num_nodes) + np.bincount(targets, minlength=num_nodes)
+        pending = pending[degrees[sources[pending]] < num_nodes - 1]
+        if not len(pending):
+            break
+        keys = np.sort(np.minimum(sources, targets) * num_nodes + np.maximum(sources, targets))
+        proposed = rng.integers(num_nodes, size=len(pending))
+        new_keys = (np.minimum(sources[pending], proposed) * num_nodes + np.maximum(sources[pending], proposed))
+        found = np.searchsorted(keys, new_keys)
+        exists = keys[np.minimum(found, len(keys) - 1)] == new_keys
+        # Of several moves creating the same edge in this batch, only the first goes through
+        _, first = np.unique(new_keys, return_index=True)
+        unique = np.zeros(len(pending), dtype=bool)
+        unique[first] = True
+        accepted = (proposed != sources[pending]) & ~exists & unique
+        targets[pending[accepted]] = proposed[accepted]
+        pending = pending[~accepted]
+    dtype = np.int32 if num_nodes <= np.iinfo(np.int32).max else np.int64
+    return simplify_edges(np.stack((sources, targets), axis=1).astype(dtype), num_nodes)
+
+
+def gnp_edges(num_nodes: int, p: float, directed: bool = False,
+              rng: np.random.Generator | int | None = None) -> np.ndarray:
+    """
+    Generates the edges of an Erdos-Renyi G(n, p) graph in O(n + m) time.
+    Rather than trying every node pair, the gaps between successive edges in the enumeration of all pairs
+    are drawn in batches from a geometric distribution (Batagelj-Brandes edge skipping).
+    :param num_nodes: number of nodes of the graph.
+    :param p: probability of generating each edge.
+    :param directed: whether every ordered pair (i, j), i != j, is tried instead of every unordered pair.
+    :param rng: random generator or seed. Defaults to the shared generator, see src.tools.get_rng.
+    :return: an array of dimension (something, 2) representing all pairs of edges of the graph.
+    """
+
+    if p < 0 or p > 1:
+        raise ValueError('Probability of edge generation must be between 0 and 1.')
+
+    rng = get_rng(rng)
+    total = num_nodes * (num_nodes - 1)
+    if not directed:
+        total //= 2
+    chunks = []
+    last = -1
+    while p > 0:
+        # Draw a few standard deviations more gaps than expected so that one batch usually suffices
+        expected = (total - last - 1) * p
+        batch = int(expected + 4 * np.sqrt(expected) + 16)
+        positions = last + np.cumsum(rng.geometric(p=p, size=batch))
+        if positions[-1] >= total:
+            chunks.append(positions[positions < total])
+            break
+        chunks.append(positions)
+        last = positions[-1]
+    positions = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int64)
+    return _decode_pairs(positions, num_nodes, directed)
+
+
+def iter_gnp_edges(num_nodes: int, p: float, directed: bool = False, chunk_size: int = 2 ** 20,
+                   rng: np.random.Generator | int | None = None):
+    """
+    Stream the edges of an Erdos-Renyi G(n, p) graph in chunks, by the same edge skipping as gnp_edges,
+    so that graphs with more edges than fit in memory can be written out as they are generated.
+    :param num_nodes: number of nodes of the graph.
+    :param p: probability of generating each edge.
+    :param directed: whether every ordered pair (i, j), i != j, is tried instead of every unordered pair.
+    :param chunk_size: number of pair positions drawn per chunk; chunks hold about chunk_size edges.
+    :param rng: random generator or seed. Defaults to the shared generator, see src.tools.get_rng.
+    :return: Yields arrays of shape (something, 2) of edges, in the enumeration order of gnp_edges.
+    """
+
+    if p < 0 or p > 1:
+        raise ValueError('Probability of edge generation must be between 0 and 1.')
+    if chunk_size < 1:
+        raise ValueError('Chunk size must be positive.')
+
+    rng = get_rng(rng)
+    total = num_nodes * (num_nodes - 1)
+    if not directed:
+        total //= 2
+    last = -1
+    while p > 0:
+        positions = last + np.cumsum(rng.geometric(p=p, size=chunk_size))
+        if positions[-1] >= total:
+            yield _decode_pairs(positions[positions < total], num_nodes, directed)
+            return
+        yield _decode_pairs(positions, num_nodes, directed)
+        last = positions[-1]
+
+
+def _decode_pairs(positions: np.ndarray, num_nodes: int, directed: bool) -> np.ndarray:
+    # Turn positions in the enumeration of all node pairs into (i, j) pairs
+    if directed:
+        # Pair k is (k // (n - 1), k % (n - 1)), with the target shifted past the diagonal
+        i = positions // (num_nodes - 1)
+        j = positions % (num_nodes - 1)
+        j += j >= i
+    else:
+        # Pair k is (i, j) with j < i and k = i(i - 1)/2 + j, matching the order of the naive method
+        i = ((1 + np.sqrt(1 + 8 * positions.astype(np.float64))) // 2).astype(np.int64)
+        i -= i * (i - 1) // 2 > positions
+        i += (i + 1) * i // 2 <= positions
+        j = positions - i * (i - 1) // 2
+    dtype = np.int32 if num_nodes <= np.iinfo(np.int32).max else np.int64
+    return np.stack((i, j), axis=1).astype(dtype)
+
+
+def random_graph(num_nodes: int, p: float = 0.0, deg: float = 0.0, method: str = 'naive', directed: bool = False,
+                 simple: bool = False, csr: bool = False, exponent: float = 2.5,
+                 rng: np.random.Generator | int | None = None) -> Graph | CsrGraph:
     """
     Random graph is a graph where generation of edges subject to a Bernoulli variable.
 
     :param num_nodes: the number of nodes in the graph.
-    :param p: parameter of the Bernoulli variable; the probability of generating edges. Used with 'naive' and 'two-step' methods.
-    :param deg: mean degree of nodes of the graph. Used with 'geometric' method.
-    :param method: the method to use for generating edges, either 'naive' or 'two-step'. If naive method is used, each pair of nodes will be attempted. If two-step is used, an edge count will be sampled, first, and then edge is generated uniformly.
+    :param p: parameter of the Bernoulli variable; the probability of generating edges. Used with 'naive', 'two-step' and 'sparse' methods. For 'watts-strogatz', the rewiring probability.
+    :param deg: mean degree of nodes of the graph. Used with the configuration models, 'chung-lu', 'barabasi-albert' (deg / 2 edges per node) and 'watts-strogatz' (deg ring neighbours).
+    :param method: the method to use for generating edges, either 'naive' or 'two-step'. If naive method is used, each pair of nodes will be attempted. If two-step is used, an edge count will be sampled, first, and then edge is generated uniformly. If sparse is used, non-edges are skipped over with geometric jumps, in O(n + m) time. 'geometric', 'poisson' and 'power-law' are configuration models with that degree distribution; 'chung-lu' draws edges for power-law expected degrees; 'barabasi-albert' grows the graph by preferential attachment; 'watts-strogatz' rewires a ring lattice. 'power-law', 'chung-lu', 'barabasi-albert' and 'watts-strogatz' always give simple, undirected graphs.
     :param directed: whether the graph is directed or undirected.
+    :param simple: whether to erase self-loops and multi-edges. Used with 'geometric' and 'poisson' methods.
+    :param csr: whether to return an immutable CsrGraph instead of a Graph.
+    :param exponent: power-law exponent of the degrees, used with 'power-law' and 'chung-lu' methods.
+    :param rng: random generator or seed. Defaults to the shared generator, see src.tools.get_rng.
     """
 
     if num_nodes <= 1:
         raise ValueError('Number of nodes must be greater than 1.')
+    rng = get_rng(rng)
 
-    graph = Graph(num_nodes, directed=directed)
+    with instrument.phase(f'random_graph.{method}'):
+        if method == 'naive':
+            if p < 0 or p > 1:
+                raise ValueError('Probability of edge generation must be between 0 and 1.')
+            graph = Graph(num_nodes, directed=directed)
+            pool = UniformPool(rng)
+            edge_count = 0
+            for i in range(num_nodes):
+                for j in range(i):
+                    if pool.bernoulli(p) == 1:
+                        graph.add_edge(i, j)
+                        edge_count += 1
+            instrument.count('random_graph.bernoulli_draws', num_nodes * (num_nodes - 1) // 2)
 
-    if method == 'naive':
-        if p < 0 or p > 1:
-            raise ValueError('Probability of edge generation must be between 0 and 1.')
-        for i in range(num_nodes):
-            for j in range(i):
-                if bernoulli_sample(p=p) == 1:
+        elif method == 'two-step':
+            if p < 0 or p > 1:
+                raise ValueError('Probability of edge generation must be between 0 and 1.')
+            graph = Graph(num_nodes, directed=directed)
+            edge_count = sample_edge_count(num_nodes=num_nodes, p=p, rng=rng)
+            pool = UniformPool(rng)
+            attempts = 0
+            draws = 0
+            while attempts < edge_count:
+                i = pool.integers(num_nodes)
+                j = pool.integers(num_nodes)
+                draws += 1
+                if not (i == j or (j in graph.adj[i])):
                     graph.add_edge(i, j)
+                    attempts += 1
+            instrument.count('random_graph.pair_draws', draws)
 
-    elif method == 'two-step':
-        if p < 0 or p > 1:
-            raise ValueError('Probability of edge generation must be between 0 and 1.')
-        edge_count = sample_edge_count(num_nodes=num_nodes, p=p)
-        attempts = 0
-        while attempts < edge_count:
-            i = np.random.randint(num_nodes)
-            j = np.random.randint(num_nodes)
-            if not (i == j or (j in graph.adj[i])):
-                graph.add_edge(i, j)
-                attempts += 1
-
-    elif method in ['geometric', 'poisson']:
-        if deg < 0:
-            raise ValueError('Degree of nodes must not be negative.')
-        edge_list = configuration_model(num_nodes, deg, method)
-        for edge in edge_list:
-            graph.add_edge(*edge)
+        elif method == 'sparse':
+            edge_list = gnp_edges(num_nodes, p, directed=directed, rng=rng)
+            instrument.count('random_graph.edges', len(edge_list))
+            csr_graph = CsrGraph.from_edges(num_nodes, edge_list, directed=directed)
+            return csr_graph if csr else csr_graph.to_graph()
 
-    else:
-        raise Exception(f'Method {method} is not supported.')
+        elif method in ['geometric', 'poisson']:
+            if deg < 0:
+                raise ValueError('Degree of nodes must not be negative.')
+            edge_list = configuration_model(num_nodes, deg, method, simple=simple, directed=directed, rng=rng)
+            instrument.count('random_graph.edges', len(edge_list))
+            csr_graph = CsrGraph.from_edges(num_nodes, edge_list, directed=directed)
+            return csr_graph if csr else csr_graph.to_graph()
+
+        elif method in ['power-law', 'chung-lu', 'barabasi-albert', 'watts-strogatz']:
+            if directed:
+                # simplify_edges orients every edge from the smaller to the larger index
+                raise ValueError(f'Method {method} only generates undirected graphs.')
+            if method == 'power-law':
+                edge_list = configuration_model(num_nodes, deg, method, simple=True, exponent=exponent, rng=rng)
+            elif method == 'chung-lu':
+                edge_list = chung_lu_edges(power_law_degrees(num_nodes, deg, exponent, rng=rng), rng=rng)
+            elif method == 'barabasi-albert':
+                edge_list = barabasi_albert_edges(num_nodes, max(1, round(deg / 2)), rng=rng)
+            else:
+                edge_list = watts_strogatz_edges(num_nodes, 2 * max(1, round(deg / 2)), p, rng=rng)
+            instrument.count('random_graph.edges', len(edge_list))
+            csr_graph = CsrGraph.from_edges(num_nodes, edge_list)
+            return csr_graph if csr else csr_graph.to_graph()
+
+        else:
+            raise Exception(f'Method {method} is not supported.')
 
-    return graph
\ No newline at end of file
+        instrument.count('random_graph.edges', edge_count)
+        return CsrGraph.from_graph(graph) if csr else graph
\ No newline at end of file
@@ -1,115 +1,79 @@
 import numpy as np
-from src.graph import Graph
+from src.graph import Graph, CsrGraph, as_csr
+from src.graph_methods.friendship import friends_degree, neighbor_mean, sample_friend_degrees
+from src.graph_methods.traversal import bfs
 
-def count_edges(graph: Graph, method='naive') -> int:
+def count_edges(graph: Graph | CsrGraph, method='naive') -> int:
     """
     Count the number of edges in a network.
     :param graph: the network
-    :param method: 'naive' lists all edges by visiting all node pairs.
-    :return: An integer of count. Returns -1 if no proper method is selected.
+    :param method: 'naive' counts the stored adjacency entries.
+    :return: An integer of count; an undirected edge, including a self-loop, counts once.
     """
     if method == 'naive':
-        return len(graph.adj)
+        csr = as_csr(graph)
+        # An undirected edge is stored once in each row, a self-loop twice in its own
+        return csr.num_entries if csr.directed else csr.num_entries // 2
     else:
         raise Exception(f'Method {method} not supported.')
 
 
-def get_reachable(network: Graph, starting_node: int = 1) -> list[int]:
+def get_reachable(network: Graph | CsrGraph, starting_node: int = 1) -> list[int]:
     """
-    Get a list of nodes reachable from a starting node using a naive search-along-graph method.
+    Get a list of nodes reachable from a starting node by breadth-first search, see traversal.bfs.
     :param network: the graph to count.
     :param starting_node: staring node to count from. Default set to 1 as assignment 1.7.
     :return: A list of indices of all reachable nodes.
     """
 
-    if starting_node < 0 or starting_node >= network.num_nodes:
-        raise ValueError('Invalid starting node index.')
+    return bfs(network, starting_node).tolist()
 
-    to_visit = [starting_node]
-    visited = []
-    while to_visit:
-        node = to_visit.pop(0)
-        visited.append(node)
-        if network.neighbors(node) is None:
-            continue
-        for neighbor in network.neighbors(node):
-            if neighbor not in visited and neighbor not in to_visit:
-                to_visit.append(neighbor)
-    return visited
 
-
-def get_degree_dist(graph: Graph) -> list[int]:
+def get_degree_dist(graph: Graph | CsrGraph) -> list[int]:
     """
     Get degree distribution of a graph as a list.
     :param graph: the graph to count.
     :return: a list of degrees of each node.
     """
 
-    degree_dist: list[int] = []
-    for i in range(graph.num_nodes):
-        degree_dist.append(len(graph.neighbors(i)))
-    if len(degree_dist) != graph.num_nodes:
-        raise ValueError('Length of degree distribution does not match graph.')
-    return degree_dist
+    return as_csr(graph).degrees.tolist()
 
 
-def get_friends_degree(graph: Graph, method = 'sample', repeat = 2000, return_both = False) -> list[float] | tuple[list[float], list[float]]:
+def get_friends_degree(graph: Graph | CsrGraph, method = 'sample', repeat = 2000, return_both = False,
+                       rng: np.random.Generator | int | None = None) -> list[float] | tuple[list[float], list[float]]:
     """
-    Get distributions of average of friends' degrees of a graph as a list.
+    Get distributions of average of friends' degrees of a graph as a list, see friendship.sample_friend_degrees.
     :param graph: The graph to count.
-    :param method: 'Sample' estimated degree by sampling nodes, and 'iterate' lists all edges by visiting all node pairs.
-    :param repeat: Number of times to repeat the estimate.
-    :return: A list of average of friends' degrees of each node.
+    :param method: 'sample' picks random nodes with at least one friend and one random friend of each,
+     'edge' picks random edges instead, and 'iterate' averages over all friends of every node with friends.
+    :param repeat: Number of samples to draw.
+    :param return_both: Whether to also return the degrees of the nodes themselves.
+    :param rng: random generator or seed. Defaults to the shared generator, see src.tools.get_rng.
+    :return: A list of average of friends' degrees of each node, preceded by the list of their own degrees
+     if return_both is set.
     """
 
-    degree_dist: list[float] = []
-    second_dist: list[float] = []
-
     if method == 'sample':
-        count = 0
-        while True:
-            i = np.random.randint(graph.num_nodes)
-            if len(graph.neighbors(i)) == 0:
-                continue
-            if return_both:
-                second_dist.append(len(graph.neighbors(i)))
-            j = np.random.randint(len(graph.neighbors(i)))
-            friend = graph.neighbors(i)[j]
-            degree_dist.append(len(graph.neighbors(friend)))
-            count += 1
-            if count >= repeat:
-                break
-
+        second_dist, degree_dist = sample_friend_degrees(graph, repeat, mode='node', rng=rng)
+    elif method == 'edge':
+        second_dist, degree_dist = sample_friend_degrees(graph, repeat, mode='edge', rng=rng)
     elif method == 'iterate':
-        for i in range(graph.num_nodes):
-            count: float = 0
-            if len(graph.neighbors(i)) == 0:
-                break
-            for j in graph.neighbors(i):
-                count += len(graph.neighbors(j))
-            count /= len(graph.neighbors(i))
-            degree_dist.append(count)
+        degrees = as_csr(graph).degrees
+        second_dist = degrees[degrees > 0]
+        degree_dist = friends_degree(graph)[degrees > 0]
+    else:
+        raise Exception(f'Method {method} is not supported.')
 
     if return_both:
-        return second_dist, degree_dist
-    return degree_dist
+        return second_dist.tolist(), degree_dist.tolist()
+    return degree_dist.tolist()
 
 
-def friend_infect_vec(graph: Graph, infect_vec: list) -> list:
+def friend_infect_vec(graph: Graph | CsrGraph, infect_vec: list | np.ndarray) -> np.ndarray:
     """
     Estimate probability of infection from friend vector given probability of infection vector.
     :param graph: The graph.
     :param infect_vec: Probability of infection vector.
-    :return: A list representing the vector.
+    :return: An array of the mean probability of infection of the friends of each node with at least one friend.
     """
-    res_vec = []
-    degrees = get_degree_dist(graph)
-    for i in range(graph.num_nodes):
-        if degrees[i] == 0:
-            continue
-        total = 0
-        for j in graph.neighbors(i):
-            total += infect_vec[j]
-        total /= degrees[i]
-        res_vec.append(total)
-    return res_vec
\ No newline at end of file
+    return neighbor_mean(graph, infect_vec)[as_csr(graph).degrees > 0]
\ No newline at end of file
@@ -0,0 +1,144 @@
+import numpy as np
+from src.graph import Graph, CsrGraph, as_csr
+from src.tools import get_rng
+
+
+class GraphSummary(object):
+    """
+    Structural statistics of a graph, computed together by summarize and cached on the graph.
+
+    Attributes:
+    num_nodes, num_edges: node and edge counts; an undirected edge, including a self-loop, counts once.
+    degrees: read-only array of the (out-)degree of every node.
+    mean_degree, second_moment, max_degree: <k>, <k^2> and the largest degree.
+    mean_excess_degree: <k^2>/<k>, the mean degree of a node reached by following an edge.
+    degree_histogram: number of nodes of each degree, indexed by degree.
+    self_loops, multi_edges: number of self-loops, and of edges repeating an earlier edge between the same nodes.
+    assortativity: Pearson correlation of the degrees at the two ends of an edge, nan if undefined.
+    clustering, transitivity: average local clustering coefficient and fraction of closed wedges, estimated from
+     clustering_samples random wedges; nan until sampled.
+    """
+
+    def __init__(self):
+        self.num_nodes = 0
+        self.num_edges = 0
+        self.directed = False
+        self.degrees = None
+        self.mean_degree = 0.0
+        self.second_moment = 0.0
+        self.max_degree = 0
+        self.mean_excess_degree = np.nan
+        self.degree_histogram = None
+        self.self_loops = 0
+        self.multi_edges = 0
+        self.assortativity = np.nan
+        self.clustering = np.nan
+        self.transitivity = np.nan
+        self.clustering_samples = 0
+        self._keys = None # Sorted distinct packed (source, target) keys, kept for adjacency tests
+
+    def to_dict(self) -> dict:
+        """
+        :return: the scalar statistics as a dict.
+        """
+        return {name: value for name, value in vars(self).items()
+                if not name.startswith('_') and name not in ('degrees', 'degree_histogram')}
+
+
+def summarize(graph: Graph | CsrGraph, clustering_samples: int = 0,
+              rng: np.random.Generator | int | None = None) -> GraphSummary:
+    """
+    Compute the structural statistics of a graph in one vectorized pass over its CSR arrays.
+    The summary is cached on the graph, and dropped again by Graph.add_edge, so repeated calls cost nothing.
+    :param graph: the graph.
+    :param clustering_samples: number of random wedges sampled to estimate the clustering coefficients;
+     0 skips them. A cached summary is only resampled if more samples are asked for.
+    :param rng: random generator or seed for the wedge sampling. Defaults to the shared generator.
+    :return: the GraphSummary.
+    """
+    summary = getattr(graph, '_summary', None)
+    if summary is None:
+        summary = _summarize(as_csr(graph))
+        graph._summary = summary
+    if clustering_samples > summary.clustering_samples:
+        _sample_clustering(as_csr(graph), summary, clustering_samples, get_rng(rng))
+    return summary
+
+
+def _summarize(csr: CsrGraph) -> GraphSummary:
+    summary = GraphSummary()
+    n = csr.num_nodes
+    degrees = csr.degrees
+    summary.num_nodes = n
+    summary.directed = csr.directed
+    summary.degrees = degrees
+    summary.degree_histogram = np.bincount(degrees)
+    summary.max_degree = int(degrees.max())
+    k = degrees.astype(np.float64)
+    summary.mean_degree = float(k.mean())
+    summary.second_moment = float((k ** 2).mean())
+    if summary.mean_degree > 0:
+        summary.mean_excess_degree = summary.second_moment / summary.mean_degree
+
+    rows = np.repeat(np.arange(n, dtype=np.int64), degrees)
+    keys = rows * n + csr.indices
+    is_loop = rows == csr.indices
+    loop_nodes = keys[is_loop] // n
+    keys = keys[~is_loop]
+    keys.sort()
+    distinct = np.concatenate(([True], keys[1:] != keys[:-1])) if len(keys) else np.zeros(0, dtype=bool)
+    repeats = len(keys) - int(np.count_nonzero(distinct))
+    summary._keys = keys[distinct]
+    # Graph.add_edge stores an undirected self-loop twice in its row, and every other edge once in each row
+    loops = len(loop_nodes) if csr.directed else len(loop_nodes) // 2
+    # Loops beyond the first at each node are repeated edges too
+    summary.self_loops = loops
+    summary.multi_edges = loops - len(np.unique(loop_nodes))
+    if csr.directed:
+        summary.num_edges = csr.num_entries
+        summary.multi_edges += repeats
+    else:
+        summary.num_edges = csr.num_entries // 2
+        summary.multi_edges += repeats // 2
+
+    if csr.num_entries:
+        source_degrees = k[rows]
+        target_degrees = k[csr.indices]
+        source_std, target_std = source_degrees.std(), target_degrees.std()
+        if source_std > 0 and target_std > 0:
+            covariance = np.mean(source_degrees * target_degrees) - source_degrees.mean() * target_degrees.mean()
+            summary.assortativity = float(covariance / (source_std * target_std))
+    return summary
+
+
+def _sample_clustering(csr: CsrGraph, summary: GraphSummary, samples: int, rng: np.random.Generator) -> None:
+    # A wedge is a pair of distinct neighbour slots of a centre node; it is closed if its ends are adjacent.
+    # Centres drawn uniformly among nodes of degree >= 2 estimate the average local clustering, centres drawn
+    # in proportion to their number of wedges estimate the transitivity.
+    degrees = csr.degrees.astype(np.int64)
+    centres = np.flatnonzero(degrees >= 2)
+    if len(centres) == 0:
+        summary.clustering = summary.transitivity = 0.0
+        summary.clustering_samples = samples
+        return
+    wedges = (degrees[centres] * (degrees[centres] - 1)).astype(np.float64)
+    uniform = centres[rng.integers(len(centres), size=samples)]
+    weighted = centres[np.minimum(np.searchsorted(np.cumsum(wedges), rng.random(samples) * wedges.sum(),
+                                                  side='right'), len(centres) - 1)]
+    summary.clustering = _closed_fraction(csr, summary._keys, uniform, rng)
+    summary.transitivity = _closed_fraction(csr, summary._keys, weighted, rng)
+    summary.clustering_samples = samples
+
+
+def _closed_fraction(csr: CsrGraph, keys: np.ndarray, centres: np.ndarray, rng: np.random.Generator) -> float:
+    degrees = csr.degrees[centres].astype(np.int64)
+    first = (rng.random(len(centres)) * degrees).astype(np.int64)
+    # Second slot drawn among the other degree - 1 slots
+    second = (rng.random(len(centres)) * (degrees - 1)).astype(np.int64)
+    second += second >= first
+    a = csr.indices[csr.indptr[centres] + first].astype(np.int64)
+    b = csr.indices[csr.indptr[centres] + second].astype(np.int64)
+    wedge_keys = a * csr.num_nodes + b
+    found = np.minimum(np.searchsorted(keys, wedge_keys), len(keys) - 1)
+    closed = (keys[found] == wedge_keys) & (a != b)
+    return float(np.mean(closed))
\ No newline at end of file
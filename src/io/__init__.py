@@ -1 +1,3 @@
-from .graph_io import *
\ No newline at end of file
+from .graph_io import *
+from .cache import *
+from .stream import *
\ No newline at end of file
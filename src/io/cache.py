@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import src
+from src.graph import Graph, CsrGraph
+from src.graph_methods import random_graph
+from src.io.graph_io import save_dir, save_csr, load_csr
+
+CACHE_SUFFIX = '.csr'
+
+
+class GraphCache(object):
+    """
+    Content-addressed on-disk cache of generated graphs.
+
+    Entries are binary CSR files named by a hash of the generator parameters, seed and library version.
+    Hits refresh the file's modification time, and the least recently used entries are evicted once the
+    cache grows beyond its size budget. Entries are written to a temporary file and renamed into place,
+    so concurrent workers never see a partial file.
+    """
+
+    def __init__(self, directory: str | Path = save_dir / 'cache', max_bytes: int = 2 ** 30):
+        """
+        :param directory: directory holding the cache entries; created if missing.
+        :param max_bytes: size budget of the cache in bytes.
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, **params) -> str:
+        """
+        Hash generator parameters into a cache key. The library version is always included.
+        :param params: generator parameters, including the seed.
+        :return: a hex digest.
+        """
+        params = dict(params, version=src.__version__)
+        return hashlib.sha256(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> CsrGraph | None:
+        """
+        Look up a cache entry and mark it as recently used.
+        :param key: cache key.
+        :return: the memory-mapped graph, or None on a miss.
+        """
+        path = self.directory / (key + CACHE_SUFFIX)
+        try:
+            os.utime(path)
+            graph = load_csr(path)
+        except (FileNotFoundError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return graph
+
+    def put(self, key: str, graph: Graph | CsrGraph, params: dict | None = None, seed: int | None = None) -> None:
+        """
+        Store a graph atomically, then evict old entries beyond the size budget.
+        :param key: cache key.
+        :param graph: the graph to store.
+        :param params: generator parameters to record in the file header.
+        :param seed: seed to record in the file header.
+        """
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(fd)
+        try:
+            save_csr(graph, tmp_name, params=params, seed=seed)
+            os.replace(tmp_name, self.directory / (key + CACHE_SUFFIX))
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Remove least recently used entries until the cache fits its size budget.
+        """
+        entries = []
+        for path in self.directory.glob('*' + CACHE_SUFFIX):
+            try:
+                stat = path.stat()
+            except FileNotFoundError: # Removed by another process
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def random_graph(self, num_nodes: int, p: float = 0.0, deg: float = 0.0, method: str = 'naive',
+                     directed: bool = False, simple: bool = False, csr: bool = False, exponent: float = 2.5,
+                     seed: int | None = None) -> Graph | CsrGraph:
+        """
+        Cached version of random_graph. Only seeded calls are cached: without a seed every call
+        must give an independent graph, so it is generated afresh.
+        :param seed: integer seed of the generator.
+        :return: see random_graph.
+        """
+        if seed is None:
+            return random_graph(num_nodes, p=p, deg=deg, method=method, directed=directed, simple=simple, csr=csr,
+                                exponent=exponent)
+
+        params = {'method': method, 'num_nodes': int(num_nodes), 'p': float(p), 'deg': float(deg),
+                  'directed': bool(directed), 'simple': bool(simple), 'exponent': float(exponent)}
+        seed = int(seed)
+        key = self.key(seed=seed, **params)
+        graph = self.get(key)
+        if graph is None:
+            graph = random_graph(num_nodes, p=p, deg=deg, method=method, directed=directed, simple=simple,
+                                 csr=True, exponent=exponent, rng=seed)
+            self.put(key, graph, params=params, seed=seed)
+        return graph if csr else graph.to_graph()
+
+    def stats(self) -> dict:
+        """
+        Hit and miss counts of this cache object, and the current number and total size of entries.
+        """
+        sizes = [path.stat().st_size for path in self.directory.glob('*' + CACHE_SUFFIX)]
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(sizes), 'bytes': sum(sizes)}
+
+    def clear(self) -> None:
+        """
+        Remove every entry.
+        """
+        for path in self.directory.glob('*' + CACHE_SUFFIX):
+            path.unlink(missing_ok=True)
+
+
+def cached_random_graph(num_nodes: int, p: float = 0.0, deg: float = 0.0, method: str = 'naive',
+                        directed: bool = False, simple: bool = False, csr: bool = False, exponent: float = 2.5,
+                        seed: int | None = None, cache: GraphCache | None = None) -> Graph | CsrGraph:
+    """
+    random_graph backed by a GraphCache, see GraphCache.random_graph.
+    :param cache: the cache to use. Defaults to one in saved_graphs/cache.
+    """
+    global _default_cache
+    if cache is None:
+        if _default_cache is None:
+            _default_cache = GraphCache()
+        cache = _default_cache
+    return cache.random_graph(num_nodes, p=p, deg=deg, method=method, directed=directed, simple=simple,
+                              csr=csr, exponent=exponent, seed=seed)
+
+
+_default_cache = None
\ No newline at end of file
@@ -1,20 +1,159 @@
+import json
 import pickle
+import struct
 from pathlib import Path
-from src.graph import Graph
+
+import numpy as np
+from src.graph import Graph, CsrGraph, as_csr
 
 base_dir = Path(__file__).parent.parent.parent
 save_dir = base_dir / 'saved_graphs'
 
-def save_graph(graph: Graph, filename: str) -> None:
-    path = base_dir / 'saved_graphs' / filename
+# Binary CSR format: MAGIC, then uint32 version and uint32 header length, then a JSON header
+# and the raw indptr and indices arrays, each starting on an ALIGNMENT-byte boundary.
+MAGIC = b'SF5CSR\x00\x00'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+_PREFIX = struct.Struct('<8sII')
+
+
+def save_graph(graph: Graph | CsrGraph, filename: str, params: dict | None = None, seed: int | None = None) -> None:
+    """
+    Save a graph. Files ending in '.pkl' are written in the legacy pickled adjacency list format,
+    anything else in the binary CSR format (see save_csr).
+    :param graph: the graph to save.
+    :param filename: file name, relative to saved_graphs/, or an absolute path.
+    :param params: generator parameters to record in the header of a binary file.
+    :param seed: generator seed to record in the header of a binary file.
+    """
+    path = save_dir / filename
+    if path.suffix != '.pkl':
+        save_csr(graph, path, params=params, seed=seed)
+        return
+    if isinstance(graph, CsrGraph):
+        graph = graph.to_graph()
     with open(path, 'wb') as f:
         pickle.dump(graph.adj, f)
 
+
 def load_graph(filename: str) -> Graph:
-    path = base_dir / 'saved_graphs' / filename
+    """
+    Load a graph as a list-of-lists Graph, from either the legacy pickle or the binary CSR format.
+    :param filename: file name, relative to saved_graphs/, or an absolute path.
+    :return: the graph.
+    """
+    path = save_dir / filename
+    if path.suffix != '.pkl':
+        return load_csr(path, mmap=False).to_graph()
     with open(path, 'rb') as f:
         adj = pickle.load(f)
     num_nodes = len(adj)
     graph = Graph(num_nodes)
     graph.adj = adj
-    return graph
\ No newline at end of file
+    return graph
+
+
+def save_csr(graph: Graph | CsrGraph, filename: str, params: dict | None = None, seed: int | None = None) -> None:
+    """
+    Save a graph in the versioned binary CSR format.
+    :param graph: the graph to save.
+    :param filename: file name, relative to saved_graphs/, or an absolute path.
+    :param params: generator parameters to record in the header, e.g. {'method': 'poisson', 'deg': 20}.
+    :param seed: generator seed to record in the header.
+    """
+    csr = as_csr(graph)
+    header = _make_header(csr.num_nodes, csr.num_entries, csr.directed, csr.indptr.dtype, csr.indices.dtype,
+                          params=params, seed=seed)
+    with open(save_dir / filename, 'wb') as f:
+        _write_header(f, header)
+        f.write(b'\x00' * (header['indptr_offset'] - f.tell()))
+        f.write(np.ascontiguousarray(csr.indptr).tobytes())
+        f.write(b'\x00' * (header['indices_offset'] - f.tell()))
+        f.write(np.ascontiguousarray(csr.indices).tobytes())
+
+
+def read_header(filename: str) -> dict:
+    """
+    Read only the header of a binary CSR file.
+    :param filename: file name, relative to saved_graphs/, or an absolute path.
+    :return: a dict with num_nodes, directed, num_entries, params, seed and the array layout.
+    """
+    with open(save_dir / filename, 'rb') as f:
+        magic, version, header_len = _PREFIX.unpack(f.read(_PREFIX.size))
+        if magic != MAGIC:
+            raise ValueError(f'{filename} is not a binary CSR graph file.')
+        if version > FORMAT_VERSION:
+            raise ValueError(f'Unsupported graph file version {version}.')
+        return json.loads(f.read(header_len).decode('utf-8'))
+
+
+def load_csr(filename: str, mmap: bool = True) -> CsrGraph:
+    """
+    Load a graph as a CsrGraph. Binary files are memory-mapped read-only by default, so loading is O(1),
+    pages are read on first access and are shared between processes mapping the same file.
+    Legacy '.pkl' files are read and converted.
+    :param filename: file name, relative to saved_graphs/, or an absolute path.
+    :param mmap: whether to memory-map a binary file rather than read it into memory.
+    :return: the graph.
+    """
+    path = save_dir / filename
+    if path.suffix == '.pkl':
+        return CsrGraph.from_graph(load_graph(path))
+
+    header = read_header(path)
+    num_nodes, num_entries = header['num_nodes'], header['num_entries']
+    arrays = []
+    for name, count in (('indptr', num_nodes + 1), ('indices', num_entries)):
+        dtype = np.dtype(header[name + '_dtype'])
+        offset = header[name + '_offset']
+        if mmap:
+            arrays.append(np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(count,)))
+        else:
+            arrays.append(np.fromfile(path, dtype=dtype, count=count, offset=offset))
+    graph = CsrGraph(*arrays, directed=header['directed'])
+    if mmap:
+        graph.path = str(path)
+    return graph
+
+
+def convert_graph(filename: str, target: str | None = None) -> Path:
+    """
+    Convert a legacy pickled graph into the binary CSR format.
+    The pickle does not record directedness, so the graph is stored as undirected, like load_graph assumes.
+    :param filename: the '.pkl' file, relative to saved_graphs/, or an absolute path.
+    :param target: output file. Defaults to the same name with a '.csr' suffix.
+    :return: path of the written file.
+    """
+    path = save_dir / filename
+    target = save_dir / target if target is not None else path.with_suffix('.csr')
+    save_csr(load_csr(path), target, params={'converted_from': path.name})
+    return target
+
+
+def _make_header(num_nodes: int, num_entries: int, directed: bool, indptr_dtype: np.dtype, indices_dtype: np.dtype,
+                 params: dict | None = None, seed: int | None = None) -> dict:
+    header = {
+        'num_nodes': num_nodes,
+        'directed': directed,
+        'num_entries': num_entries,
+        'indptr_dtype': np.dtype(indptr_dtype).str,
+        'indices_dtype': np.dtype(indices_dtype).str,
+        'params': params or {},
+        'seed': seed,
+    }
+    # Offsets depend on the header length, which depends on the offsets; reserve room for them first
+    header['indptr_offset'] = header['indices_offset'] = 0
+    prefix_len = _PREFIX.size + len(json.dumps(header)) + 64
+    header['indptr_offset'] = _align(prefix_len)
+    header['indices_offset'] = _align(header['indptr_offset'] + (num_nodes + 1) * np.dtype(indptr_dtype).itemsize)
+    return header
+
+
+def _write_header(f, header: dict) -> None:
+    encoded = json.dumps(header).encode('utf-8')
+    f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(encoded)))
+    f.write(encoded)
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
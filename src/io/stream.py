@@ -0,0 +1,190 @@
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+from src.graph import CsrGraph
+from src.graph_methods import iter_gnp_edges
+from src.io.graph_io import save_dir, load_csr, _make_header, _write_header
+
+
+def write_csr_streaming(num_nodes: int, edge_chunks: Iterable[np.ndarray], filename: str, directed: bool = False,
+                        simple: bool = False, memory_budget: int = 2 ** 28, params: dict | None = None,
+                        seed: int | None = None, tmp_dir: str | Path | None = None) -> Path:
+    """
+    Build a binary CSR file from a stream of edge chunks without holding the graph in memory (external sort).
+    Edges are packed into int64 (source, target) keys and buffered. Whenever the buffer fills, it is sorted and
+    spilled to a shard on disk. The shards are then merged block by block straight into the memory-mapped
+    indptr and indices arrays of the output file. The file is written under a temporary name and renamed into
+    place once complete.
+    :param num_nodes: the number of nodes in the graph.
+    :param edge_chunks: iterable of integer arrays of shape (something, 2) of (source, target) pairs,
+     e.g. iter_gnp_edges.
+    :param filename: output file, relative to saved_graphs/, or an absolute path.
+    :param directed: whether the graph is directed or undirected.
+    :param simple: whether to erase self-loops and multi-edges.
+    :param memory_budget: approximate bound in bytes on the memory used for buffers, excluding the edge chunks
+     themselves and the pages of the memory-mapped files.
+    :param params: generator parameters to record in the header.
+    :param seed: generator seed to record in the header.
+    :param tmp_dir: directory for the sorted shards. Defaults to the directory of the output file.
+    :return: path of the written file.
+    """
+    if num_nodes < 1:
+        raise ValueError('Number of nodes must be greater than 1.')
+    # Keys are 8 bytes; leave room for the sort and the chunk being packed next to the buffer
+    buffer_len = memory_budget // 32
+    if buffer_len < 1024:
+        raise ValueError('Memory budget is too small.')
+
+    path = save_dir / filename
+    shard_dir = Path(tempfile.mkdtemp(dir=tmp_dir if tmp_dir is not None else path.parent, suffix='.shards'))
+    try:
+        shards = _spill_shards(num_nodes, edge_chunks, directed, simple, buffer_len, shard_dir)
+        num_entries = sum(len(np.load(shard, mmap_mode='r')) for shard in shards)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        os.close(fd)
+        try:
+            _merge_shards(num_nodes, shards, num_entries, directed, simple, buffer_len, tmp_name, shard_dir,
+                          params, seed)
+            os.replace(tmp_name, path)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+    finally:
+        shutil.rmtree(shard_dir, ignore_errors=True)
+    return path
+
+
+def stream_random_graph(filename: str, num_nodes: int, p: float, directed: bool = False, simple: bool = False,
+                        memory_budget: int = 2 ** 28, chunk_size: int = 2 ** 20, seed: int | None = None,
+                        mmap: bool = True) -> CsrGraph:
+    """
+    Generate a G(n, p) graph straight into a binary CSR file with bounded memory, see write_csr_streaming.
+    :param filename: output file, relative to saved_graphs/, or an absolute path.
+    :param num_nodes: the number of nodes in the graph.
+    :param p: probability of generating each edge.
+    :param directed: whether the graph is directed or undirected.
+    :param simple: whether to erase multi-edges; G(n, p) has none, so only directed or undirected duplicates
+     introduced by the caller would be affected.
+    :param memory_budget: see write_csr_streaming.
+    :param chunk_size: number of edges generated per chunk.
+    :param seed: generator seed, also recorded in the header.
+    :param mmap: whether to memory-map the result, see src.io.load_csr.
+    :return: the graph, loaded from the file.
+    """
+    chunks = iter_gnp_edges(num_nodes, p, directed=directed, chunk_size=chunk_size, rng=seed)
+    params = {'method': 'sparse', 'num_nodes': num_nodes, 'p': p, 'directed': directed, 'streamed': True}
+    path = write_csr_streaming(num_nodes, chunks, filename, directed=directed, simple=simple,
+                               memory_budget=memory_budget, params=params, seed=seed)
+    return load_csr(path, mmap=mmap)
+
+
+def _spill_shards(num_nodes: int, edge_chunks: Iterable[np.ndarray], directed: bool, simple: bool,
+                  buffer_len: int, shard_dir: Path) -> list[Path]:
+    # Pack the edges into keys, sort each full buffer and write it out as a shard
+    shards = []
+    buffer = np.empty(buffer_len, dtype=np.int64)
+    filled = 0
+
+    def spill():
+        keys = buffer[:filled]
+        keys.sort()
+        if simple:
+            keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+        shard = shard_dir / f'{len(shards):06d}.npy'
+        np.save(shard, keys)
+        shards.append(shard)
+
+    for chunk in edge_chunks:
+        chunk = np.asarray(chunk).reshape(-1, 2)
+        if len(chunk) and (chunk.min() < 0 or chunk.max() >= num_nodes):
+            raise ValueError('Index out of range.')
+        src, dst = chunk[:, 0].astype(np.int64), chunk[:, 1].astype(np.int64)
+        if simple:
+            keep = src != dst
+            src, dst = src[keep], dst[keep]
+        keys = src * num_nodes + dst
+        if not directed:
+            keys = np.concatenate((keys, dst * num_nodes + src))
+        start = 0
+        while start < len(keys):
+            step = min(len(keys) - start, buffer_len - filled)
+            buffer[filled:filled + step] = keys[start:start + step]
+            filled += step
+            start += step
+            if filled == buffer_len:
+                spill()
+                filled = 0
+    if filled or not shards:
+        spill()
+    return shards
+
+
+def _merge_shards(num_nodes: int, shards: list[Path], num_entries: int, directed: bool, simple: bool,
+                  buffer_len: int, filename: str, shard_dir: Path, params: dict | None, seed: int | None) -> None:
+    # k-way merge of the sorted shards into the arrays of the output file, one block per round:
+    # every key up to the smallest last key among the current blocks of the shards is final
+    sources = [np.load(shard, mmap_mode='r') for shard in shards]
+    block_len = max(buffer_len // (2 * len(sources)), 1024)
+    positions = [0] * len(sources)
+
+    # Merging can only shrink the entry count, when duplicates are dropped, so the file is sized for the upper
+    # bound and cut down once the final count is known; the header offsets do not depend on the count
+    indptr_dtype = np.int32 if num_entries <= np.iinfo(np.int32).max else np.int64
+    indices_dtype = np.int32 if num_nodes <= np.iinfo(np.int32).max else np.int64
+    header = _make_header(num_nodes, num_entries, directed, indptr_dtype, indices_dtype, params=params, seed=seed)
+    with open(filename, 'wb') as f:
+        _write_header(f, header)
+        f.truncate(header['indices_offset'] + num_entries * np.dtype(indices_dtype).itemsize)
+    # Per-row counts are accumulated in int64 on disk, then summed into indptr
+    counts = np.lib.format.open_memmap(shard_dir / 'counts.npy', mode='w+', dtype=np.int64, shape=(num_nodes,))
+    if num_entries:
+        indices = np.memmap(filename, dtype=indices_dtype, mode='r+', offset=header['indices_offset'],
+                            shape=(num_entries,))
+
+    written = 0
+    last_key = -1
+    while True:
+        blocks = [source[pos:pos + block_len] for source, pos in zip(sources, positions)]
+        active = [k for k, block in enumerate(blocks) if len(block)]
+        if not active:
+            break
+        threshold = min(blocks[k][-1] for k in active)
+        parts = []
+        for k in active:
+            take = np.searchsorted(blocks[k], threshold, side='right')
+            parts.append(np.asarray(blocks[k][:take]))
+            positions[k] += take
+        keys = np.concatenate(parts)
+        keys.sort()
+        if simple:
+            keep = np.concatenate(([keys[0] != last_key], keys[1:] != keys[:-1]))
+            keys = keys[keep]
+        if len(keys):
+            last_key = keys[-1]
+            rows, targets = np.divmod(keys, num_nodes)
+            starts = np.flatnonzero(np.concatenate(([True], rows[1:] != rows[:-1])))
+            counts[rows[starts]] += np.diff(np.append(starts, len(rows)))
+            indices[written:written + len(keys)] = targets
+            written += len(keys)
+    if num_entries:
+        indices.flush()
+        del indices
+
+    header['num_entries'] = written
+    indptr = np.memmap(filename, dtype=indptr_dtype, mode='r+', offset=header['indptr_offset'],
+                       shape=(num_nodes + 1,))
+    indptr[0] = 0
+    total = 0
+    for start in range(0, num_nodes, block_len):
+        block = np.cumsum(counts[start:start + block_len]) + total
+        indptr[start + 1:start + 1 + len(block)] = block
+        total = int(block[-1])
+    indptr.flush()
+    del indptr, counts
+    with open(filename, 'r+b') as f:
+        _write_header(f, header)
+        f.truncate(header['indices_offset'] + written * np.dtype(indices_dtype).itemsize)
\ No newline at end of file
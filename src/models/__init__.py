@@ -1 +1,5 @@
-from .sim import *
\ No newline at end of file
+from .sim import *
+from .percolation import *
+from .parallel import *
+from .infection_times import *
+from .sweep import *
\ No newline at end of file
@@ -0,0 +1,83 @@
+import numpy as np
+from src.graph import NEVER_INFECTED
+
+
+def sir_curves(times: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Rebuild the S, I and R counts of each step from recorded infection times.
+    A node infected at step t is infectious at step t and recovered from step t + 1, as in FrontierSirGraph and
+    sir_replicas. SirGraph.advance can pass the infection on within the step it happened in, so its curves are
+    only approximated. Nodes never infected, including vaccinated ones, are counted as susceptible.
+    :param times: infection step of each node, as recorded with record_times, or a (replicas, nodes) array of them.
+    :return: A tuple of arrays (S, I, R), indexed by step up to the step at which the last epidemic dies out.
+     For several replicas each has one row per replica, padded with the final counts.
+    """
+    new = generation_sizes(times)
+    num_nodes = np.shape(times)[-1]
+    infected = np.cumsum(new, axis=-1)
+    recovered = infected - new
+    return num_nodes - infected, new, recovered
+
+
+def generation_sizes(times: np.ndarray) -> np.ndarray:
+    """
+    Count the nodes infected at each step, i.e. the size of each generation of the epidemic.
+    :param times: infection step of each node, or a (replicas, nodes) array of them.
+    :return: An array indexed by step, with one extra trailing zero for the step at which the epidemic dies out.
+     For several replicas it has one row per replica.
+    """
+    times = np.asarray(times)
+    num_steps = int(times.max(initial=NEVER_INFECTED)) + 2
+    if times.ndim == 1:
+        return np.bincount(times[times != NEVER_INFECTED], minlength=num_steps)
+    rows, nodes = np.nonzero(times != NEVER_INFECTED)
+    keys = rows.astype(np.int64) * num_steps + times[rows, nodes]
+    return np.bincount(keys, minlength=len(times) * num_steps).reshape(len(times), num_steps)
+
+
+def attack_rates(times: np.ndarray) -> np.ndarray:
+    """
+    Estimate the probability that each node is eventually infected.
+    :param times: a (replicas, nodes) array of infection steps.
+    :return: An array of the fraction of replicas in which each node was infected.
+    """
+    times = np.atleast_2d(times)
+    return np.count_nonzero(times != NEVER_INFECTED, axis=0) / len(times)
+
+
+def mean_infection_time(times: np.ndarray) -> np.ndarray:
+    """
+    Mean step at which each node is infected, over the replicas in which it is infected at all.
+    Nodes reached early by the epidemic are the hubs and sentinels of the network.
+    :param times: a (replicas, nodes) array of infection steps.
+    :return: An array of mean infection steps, nan for nodes never infected.
+    """
+    times = np.atleast_2d(times)
+    infected = times != NEVER_INFECTED
+    counts = np.count_nonzero(infected, axis=0)
+    totals = np.where(infected, times, 0).sum(axis=0, dtype=np.int64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return totals / counts
+
+
+def infection_order(times: np.ndarray) -> np.ndarray:
+    """
+    Order in which the nodes of one epidemic were infected. Nodes infected at the same step are in index order.
+    :param times: infection step of each node.
+    :return: An array of the infected nodes, earliest first.
+    """
+    times = np.asarray(times)
+    infected = np.flatnonzero(times != NEVER_INFECTED)
+    return infected[np.argsort(times[infected], kind='stable')]
+
+
+def compact_times(times: np.ndarray) -> np.ndarray:
+    """
+    Store infection times as int16 when every step fits, halving the size of a saved array.
+    :param times: infection steps.
+    :return: the same times as an int16 array if possible, otherwise unchanged.
+    """
+    times = np.asarray(times)
+    if times.size and times.max() > np.iinfo(np.int16).max:
+        return times
+    return times.astype(np.int16)
\ No newline at end of file
@@ -0,0 +1,130 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+
+import numpy as np
+from src.graph import Graph, CsrGraph, FrontierSirGraph, as_csr, sir_replicas
+from src.models.sim import outbreak_cluster_size
+from src.tools import get_rng
+
+# Graph shared by the tasks of a worker process, set once by _init_worker
+_worker_graph = None
+
+
+def map_repeats(task: Callable, graph: Graph | CsrGraph, repeat: int, seed: int | None = None,
+                workers: int | None = None, chunk_size: int = 10, **kwargs) -> list:
+    """
+    Split the repeats of a Monte Carlo experiment into chunks and run them on a process pool.
+    Chunk k always covers the same repeats and draws from the k-th child of np.random.SeedSequence(seed),
+    so the results for a given seed do not depend on the number of workers.
+    :param task: module-level function called as task(graph, repeats, rng, **kwargs) for each chunk.
+    :param graph: the graph, sent once to each worker.
+    :param repeat: total number of repeats.
+    :param seed: root seed. None draws fresh entropy.
+    :param workers: number of worker processes. 1 runs the chunks in this process; None uses all cores.
+    :param chunk_size: number of repeats per chunk.
+    :return: A list of the chunk results, in chunk order.
+    """
+    if repeat < 1:
+        raise ValueError('Number of repeats must be positive.')
+    if chunk_size < 1:
+        raise ValueError('Chunk size must be positive.')
+
+    graph = as_csr(graph)
+    sizes = [min(chunk_size, repeat - start) for start in range(0, repeat, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    if workers == 1:
+        return [task(graph, size, get_rng(s), **kwargs) for size, s in zip(sizes, seeds)]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(graph,)) as executor:
+        futures = [executor.submit(_run_chunk, task, size, s, kwargs) for size, s in zip(sizes, seeds)]
+        return [future.result() for future in futures]
+
+
+def parallel_infected_estimate(graph: Graph | CsrGraph, rate: float, prob: float, repeat: int = 200,
+                               seed: int | None = None, workers: int | None = None,
+                               chunk_size: int = 25) -> np.ndarray:
+    """
+    Parallel counterpart of SirGraph.infected_estimate.
+    :param graph: the graph.
+    :param rate: Transition rate.
+    :param prob: Initial probability of infection.
+    :param repeat: Number of epidemics to simulate.
+    :param seed: root seed; see map_repeats.
+    :param workers: number of worker processes; see map_repeats.
+    :param chunk_size: number of epidemics per chunk.
+    :return: An array of the probability that each node is eventually infected.
+    """
+    chunks = map_repeats(_infected_estimate_task, graph, repeat, seed=seed, workers=workers,
+                         chunk_size=chunk_size, rate=rate, prob=prob)
+    return np.sum(chunks, axis=0) / repeat
+
+
+def parallel_outbreak_cluster_size(graph: Graph | CsrGraph, rate: float, repeat: int = 50,
+                                   vac_list: list | None = None, seed: int | None = None,
+                                   workers: int | None = None, chunk_size: int = 5) -> list:
+    """
+    Parallel counterpart of outbreak_cluster_size.
+    :param graph: the graph.
+    :param rate: Transition rate.
+    :param repeat: Repeat times.
+    :param vac_list: List of vaccinated nodes.
+    :param seed: root seed; see map_repeats.
+    :param workers: number of worker processes; see map_repeats.
+    :param chunk_size: number of repeats per chunk.
+    :return: A list of cluster sizes sampled from different experiments and nodes.
+    """
+    chunks = map_repeats(_outbreak_task, graph, repeat, seed=seed, workers=workers,
+                         chunk_size=chunk_size, rate=rate, vac_list=vac_list)
+    return [size for chunk in chunks for size in chunk]
+
+
+def parallel_run(graph: Graph | CsrGraph, rate: float, prob: float, repeat: int, seed: int | None = None,
+                 workers: int | None = None, chunk_size: int = 10) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Run repeated epidemics with FrontierSirGraph.run on a process pool.
+    :param graph: the graph.
+    :param rate: Transition rate.
+    :param prob: Initial probability of infection.
+    :param repeat: Number of epidemics to simulate.
+    :param seed: root seed; see map_repeats.
+    :param workers: number of worker processes; see map_repeats.
+    :param chunk_size: number of epidemics per chunk.
+    :return: A pair of arrays (final recovered count, time taken to reach steady state) with one entry per epidemic.
+    """
+    chunks = map_repeats(_run_task, graph, repeat, seed=seed, workers=workers,
+                         chunk_size=chunk_size, rate=rate, prob=prob)
+    sizes, times = zip(*chunks)
+    return np.concatenate(sizes), np.concatenate(times)
+
+
+def _init_worker(graph: CsrGraph) -> None:
+    global _worker_graph
+    _worker_graph = graph
+
+
+def _run_chunk(task: Callable, size: int, seed: np.random.SeedSequence, kwargs: dict):
+    return task(_worker_graph, size, get_rng(seed), **kwargs)
+
+
+def _infected_estimate_task(graph: CsrGraph, repeat: int, rng: np.random.Generator,
+                            rate: float, prob: float) -> np.ndarray:
+    # Recovered counts rather than probabilities, so that chunks of different sizes add up
+    recovered, _, _ = sir_replicas(graph, rate, prob, repeat=repeat, rng=rng, counts=True)
+    return recovered
+
+
+def _outbreak_task(graph: CsrGraph, repeat: int, rng: np.random.Generator,
+                   rate: float, vac_list: list | None) -> list:
+    return outbreak_cluster_size(graph, rate, repeat=repeat, vac_list=vac_list, rng=rng)
+
+
+def _run_task(graph: CsrGraph, repeat: int, rng: np.random.Generator,
+              rate: float, prob: float) -> tuple[np.ndarray, np.ndarray]:
+    sir = FrontierSirGraph(graph, rng=rng)
+    sizes = np.zeros(repeat, dtype=np.int64)
+    times = np.zeros(repeat, dtype=np.int64)
+    for k in range(repeat):
+        sir.set_init_state(prob)
+        state, times[k] = sir.run(rate)
+        sizes[k] = np.count_nonzero(state == sir.R)
+    return sizes, times
@@ -0,0 +1,164 @@
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components, minimum_spanning_tree
+from scipy.stats import binom
+from src.graph import Graph, CsrGraph, as_csr
+from src.tools import get_rng, instrument
+
+_TAIL = 1e-12 # Binomial tail mass left out of the average over levels in percolation_sweep
+
+
+def edge_array(graph: Graph | CsrGraph) -> tuple[np.ndarray, np.ndarray]:
+    """
+    List every edge of a graph once.
+    For undirected graphs each edge is stored twice in the adjacency, and only the copy with source < target is kept;
+    self-loops are dropped, as they never join two clusters.
+    :param graph: the graph.
+    :return: A pair of arrays (sources, targets).
+    """
+    csr = as_csr(graph)
+    src = np.repeat(np.arange(csr.num_nodes, dtype=csr.indices.dtype), csr.degrees)
+    dst = csr.indices
+    keep = src != dst if csr.directed else src < dst
+    return src[keep], dst[keep]
+
+
+def percolate(graph: Graph | CsrGraph, rate: float, repeat: int = 1, vac_mask: np.ndarray | None = None,
+              sample_nodes: int = 0,
+              rng: np.random.Generator | int | None = None) -> tuple[list[np.ndarray], np.ndarray | None]:
+    """
+    Bond percolation: keep each edge independently with probability rate and label the resulting clusters.
+    Each repeat draws one Bernoulli mask over all edges and labels the components with
+    scipy.sparse.csgraph.connected_components.
+    :param graph: The graph.
+    :param rate: Transition rate, i.e. the probability that an edge is kept.
+    :param repeat: Repeat times.
+    :param vac_mask: Boolean array marking vaccinated nodes. Their edges are never kept, so they form clusters of size 1.
+    :param sample_nodes: Number of uniformly random nodes per repeat whose cluster size is reported.
+    :param rng: random generator or seed. Defaults to the shared generator, see src.tools.get_rng.
+    :return: A pair (sizes, samples). sizes[r] holds the size of every cluster of repeat r.
+     samples is an array of shape (repeat, sample_nodes) of the sizes of the clusters containing
+     the sampled nodes, i.e. a size-biased sample, or None if sample_nodes is 0.
+    """
+    if not 0.0 <= rate <= 1.0:
+        raise ValueError('Transition rate must be between 0 and 1.')
+    rng = get_rng(rng)
+    n = graph.num_nodes
+    csr = as_csr(graph)
+    if vac_mask is not None:
+        csr = csr.drop_nodes(vac_mask)
+    src, dst = edge_array(csr)
+
+    sizes = []
+    samples = np.zeros((repeat, sample_nodes), dtype=np.int64) if sample_nodes else None
+    for r in range(repeat):
+        with instrument.phase('percolation.rng'):
+            kept = rng.random(len(src)) < rate
+        with instrument.phase('percolation.components'):
+            adjacency = coo_matrix((np.ones(np.count_nonzero(kept), dtype=np.int8), (src[kept], dst[kept])),
+                                   shape=(n, n))
+            num_clusters, labels = connected_components(adjacency, directed=False)
+            cluster_sizes = np.bincount(labels)
+        instrument.count('percolation.repeats')
+        instrument.count('percolation.bernoulli_draws', len(src))
+        instrument.count('percolation.unions', n - num_clusters)
+        sizes.append(cluster_sizes)
+        if sample_nodes:
+            samples[r] = cluster_sizes[labels[rng.integers(n, size=sample_nodes)]]
+    return sizes, samples
+
+
+def percolation_sweep(graph: Graph | CsrGraph, rates: np.ndarray, repeat: int = 10, vac_mask: np.ndarray | None = None,
+                      rng: np.random.Generator | int | None = None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Cluster statistics of bond percolation for a whole range of rates at once (Newman-Ziff).
+    Each repeat adds the edges in one random order and records the observables after every number k of occupied
+    edges; averaging them over k ~ Binomial(num_edges, rate) gives the result for any rate. The average only runs
+    over the levels k within the binomial's bulk (tails below 1e-12 are dropped), about 7 standard deviations
+    either side of the mean, rather than over all num_edges + 1 of them. Only the edges of the
+    minimum spanning forest under the random order change the clusters, so the union-find runs over at most
+    num_nodes - 1 merges.
+    :param graph: The graph.
+    :param rates: Transition rates to report.
+    :param repeat: Number of random edge orders to average over.
+    :param vac_mask: Boolean array marking vaccinated nodes, whose edges are never kept.
+    :param rng: random generator or seed. Defaults to the shared generator, see src.tools.get_rng.
+    :return: A tuple of arrays, one entry per rate: (mean outbreak cluster size seen from a random node,
+     mean size of the largest cluster, coefficient of variation of the cluster size seen from a random node).
+    """
+    rates = np.asarray(rates, dtype=np.float64)
+    if np.any((rates < 0) | (rates > 1)):
+        raise ValueError('Transition rate must be between 0 and 1.')
+    rng = get_rng(rng)
+    n = graph.num_nodes
+    csr = as_csr(graph)
+    if vac_mask is not None:
+        csr = csr.drop_nodes(vac_mask)
+    src, dst = edge_array(csr)
+    num_edges = len(src)
+    # A multi-edge joins its two nodes as soon as its earliest copy is added
+    pairs, copy_of = np.unique(src.astype(np.int64) * n + dst, return_inverse=True)
+    pair_src, pair_dst = np.divmod(pairs, n)
+    windows = []
+    for rate in rates:
+        low, high = binom.ppf(_TAIL, num_edges, rate), binom.isf(_TAIL, num_edges, rate)
+        levels = np.arange(int(low), int(high) + 1)
+        weights = binom.pmf(levels, num_edges, rate)
+        windows.append((levels, weights / weights.sum()))
+
+    first_moment = np.zeros(len(rates))
+    second_moment = np.zeros(len(rates))
+    largest = np.zeros(len(rates))
+    for _ in range(repeat):
+        pair_rank = np.full(len(pairs), num_edges, dtype=np.int64)
+        np.minimum.at(pair_rank, copy_of, rng.permutation(num_edges))
+        with instrument.phase('percolation.forest'):
+            forest = minimum_spanning_tree(coo_matrix((pair_rank + 1.0, (pair_src, pair_dst)), shape=(n, n))).tocoo()
+            order = np.argsort(forest.data)
+        with instrument.phase('percolation.union_find'):
+            sum_sq, sum_cube, biggest = _merge_observables(n, forest.row[order], forest.col[order])
+        instrument.count('percolation.repeats')
+        instrument.count('percolation.unions', len(order))
+        ranks = forest.data[order] - 1
+        for r, (levels, weights) in enumerate(windows):
+            # Number of forest merges done once the first k edges in the random order are occupied
+            merges = np.searchsorted(ranks, levels, side='left')
+            first_moment[r] += weights @ sum_sq[merges] / n
+            second_moment[r] += weights @ sum_cube[merges] / n
+            largest[r] += weights @ biggest[merges]
+    first_moment /= repeat
+    second_moment /= repeat
+    largest /= repeat
+    coeff_of_var = np.sqrt(np.maximum(second_moment - first_moment ** 2, 0)) / first_moment
+    return first_moment, largest, coeff_of_var
+
+
+def _merge_observables(num_nodes: int, sources: np.ndarray, targets: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Union-find over forest edges, recording sum of squared and cubed cluster sizes and the largest cluster size
+    # before any merge and after each one
+    parent = list(range(num_nodes))
+    size = [1] * num_nodes
+    num_merges = len(sources)
+    sum_sq = np.empty(num_merges + 1)
+    sum_cube = np.empty(num_merges + 1)
+    biggest = np.empty(num_merges + 1)
+    sum_sq[0] = sum_cube[0] = num_nodes
+    biggest[0] = 1 if num_nodes else 0
+    sq, cube, big = num_nodes, num_nodes, 1
+    for k, (i, j) in enumerate(zip(sources.tolist(), targets.tolist()), start=1):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        while parent[j] != j:
+            parent[j] = parent[parent[j]]
+            j = parent[j]
+        a, b = size[i], size[j]
+        if a < b:
+            i, j = j, i
+        parent[j] = i
+        size[i] = a + b
+        sq += 2 * a * b
+        cube += 3 * a * b * (a + b)
+        big = max(big, a + b)
+        sum_sq[k], sum_cube[k], biggest[k] = sq, cube, big
+    return sum_sq, sum_cube, biggest
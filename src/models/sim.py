@@ -1,59 +1,108 @@
-from src.graph import Graph
+import warnings
+
+from src.graph import Graph, CsrGraph, as_csr
 import numpy as np
-from scipy.cluster.hierarchy import DisjointSet
+from scipy.sparse import csr_matrix
+from src.models.percolation import percolate
+from src.tools import instrument
 
-def non_infected_probs(graph: Graph, rate: float, init_probs: list) -> list:
+def non_infected_probs(graph: Graph | CsrGraph, rate: float, init_probs: list | np.ndarray | None = None,
+                       tol: float = 0.01, max_iter: int = 1000, damping: float = 0.0,
+                       anderson: int = 0) -> np.ndarray:
     """
     Use iterated method to approximate the probability that a node never gets infected.
+    Each iteration evaluates the products over neighbours as a sparse matrix-vector product of log-factors.
     :param graph: The graph.
     :param rate: Transition rate.
-    :param init_probs: Probabilities to initialize.
-    :return: A list of probabilities.
+    :param init_probs: Probabilities to initialize. Defaults to zeros, from which the iteration rises monotonically
+     to the smallest fixed point.
+    :param tol: Stop once no probability changes by more than this in an iteration.
+    :param max_iter: Maximum number of iterations; a RuntimeWarning is issued if it is reached before convergence.
+    :param damping: Fraction of the previous iterate mixed into each update, between 0 and 1.
+    :param anderson: Depth of Anderson acceleration; 0 disables it.
+    :return: An array of probabilities.
     """
-    converged = False
-    probs = init_probs
-
-    while not converged:
-        new_probs = []
-        for i in range(len(probs)):
-            neighbors = graph.neighbors(i)
-            p = 1
-            for neighbor in neighbors:
-                p *= (1 - rate + probs[neighbor] * rate)
-            new_probs.append(p)
-        converged = True
-        for i in range(len(probs)):
-            if abs(probs[i] - new_probs[i]) > 0.01:
-                converged = False
-        if len(new_probs) != graph.num_nodes:
-            raise ValueError('Number of nodes does not match graph')
+    adjacency = _adjacency_matrix(as_csr(graph))
+    if init_probs is None:
+        probs = np.zeros(graph.num_nodes)
+    else:
+        probs = np.array(init_probs, dtype=np.float64)
+    if len(probs) != graph.num_nodes:
+        raise ValueError('Number of nodes does not match graph')
+    if not 0.0 <= damping < 1.0:
+        raise ValueError('Damping must be between 0 and 1.')
+
+    residual_diffs, update_diffs = [], []
+    last_residual = last_update = None
+    for iteration in range(1, max_iter + 1):
+        with instrument.phase('message_passing.matvec'):
+            new_probs = np.exp(adjacency @ np.log(1 - rate + probs * rate))
+        if damping:
+            new_probs = (1 - damping) * new_probs + damping * probs
+        residual = new_probs - probs
+        if np.max(np.abs(residual), initial=0.0) <= tol:
+            instrument.count('message_passing.iterations', iteration)
+            return new_probs
+        if anderson:
+            # Anderson acceleration: combine the recent updates to minimise the residual in the least-squares sense
+            if last_residual is not None:
+                residual_diffs.append(residual - last_residual)
+                update_diffs.append(new_probs - last_update)
+                del residual_diffs[:-anderson], update_diffs[:-anderson]
+            last_residual, last_update = residual, new_probs
+            if residual_diffs:
+                gamma = np.linalg.lstsq(np.stack(residual_diffs, axis=1), residual, rcond=None)[0]
+                new_probs = np.clip(new_probs - np.stack(update_diffs, axis=1) @ gamma, 0.0, 1.0)
         probs = new_probs
 
+    instrument.count('message_passing.iterations', max_iter)
+    warnings.warn(f'Iteration did not converge within {max_iter} steps.', RuntimeWarning)
     return probs
 
 
-def outbreak_cluster_size(graph: Graph, rate: float, repeat: int = 50, vac_list: list | None = []) -> list:
+def non_infected_probs_curve(graph: Graph | CsrGraph, rates: list | np.ndarray, tol: float = 0.01,
+                             max_iter: int = 1000, damping: float = 0.0, anderson: int = 0) -> np.ndarray:
+    """
+    Solve non_infected_probs for a whole list of rates, warm-starting each solve from the previous one.
+    Rates are visited from the largest down: the solution for a larger rate lies below the smallest fixed point
+    for a smaller rate, so the iteration still rises to the right solution, in fewer steps.
+    :param graph: The graph.
+    :param rates: Transition rates.
+    :param tol: see non_infected_probs.
+    :param max_iter: see non_infected_probs.
+    :param damping: see non_infected_probs.
+    :param anderson: see non_infected_probs.
+    :return: An array of shape (len(rates), num_nodes); row k holds the probabilities for rates[k].
+    """
+    rates = np.asarray(rates, dtype=np.float64)
+    curve = np.zeros((len(rates), graph.num_nodes))
+    probs = None
+    for k in np.argsort(rates)[::-1]:
+        probs = non_infected_probs(graph, rates[k], init_probs=probs, tol=tol, max_iter=max_iter,
+                                   damping=damping, anderson=anderson)
+        curve[k] = probs
+    return curve
+
+
+def _adjacency_matrix(csr: CsrGraph) -> csr_matrix:
+    # Sparse adjacency sharing the CSR arrays; repeated entries of multi-edges are summed by the product
+    data = np.ones(csr.num_entries)
+    return csr_matrix((data, csr.indices, csr.indptr), shape=(csr.num_nodes, csr.num_nodes))
+
+
+def outbreak_cluster_size(graph: Graph | CsrGraph, rate: float, repeat: int = 50, vac_list: list | None = [],
+                          rng: np.random.Generator | int | None = None) -> list:
     """
-    Obtain a distribution of outbreak cluster sizes from SciPy disjoint set.
+    Obtain a distribution of outbreak cluster sizes by bond percolation, see src.models.percolation.percolate.
+    Each edge transmits with probability rate, independently in each repeat.
     :param graph: The graph.
     :param rate: Transition rate.
     :param repeat: Repeat times.
-    :param vac_list: List of vaccinated nodes.
+    :param vac_list: List of vaccinated nodes, as a 0/1 or boolean entry per node.
+    :param rng: random generator or seed. Defaults to the shared generator, see src.tools.get_rng.
     :return: A list of cluster sizes sampled from different experiments and nodes.
     """
-    record = []
-    for _ in range(repeat):
-        C = DisjointSet(range(graph.num_nodes))
-        for i in range(graph.num_nodes):
-            if vac_list:
-                if vac_list[i]:
-                    continue
-            for j in graph.neighbors(i):
-                if vac_list:
-                    if vac_list[j]:
-                        continue
-                if np.random.random() < rate:
-                    C.merge(i, j)
-        check_node = np.random.randint(graph.num_nodes)
-        record.append(C.subset_size(check_node))
-    return record
+    vac_mask = np.asarray(vac_list, dtype=bool) if vac_list is not None and len(vac_list) else None
+    with instrument.phase('outbreak_cluster_size'):
+        _, samples = percolate(graph, rate, repeat=repeat, vac_mask=vac_mask, sample_nodes=1, rng=rng)
+    return samples[:, 0].tolist()
@@ -0,0 +1,256 @@
+import hashlib
+import itertools
+import json
+import os
+import re
+import tempfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+from src.graph import CsrGraph, sir_replicas, vaccination_mask, STRATEGIES
+from src.io import save_dir, load_csr, cached_random_graph
+from src.models.percolation import percolate
+from src.models.sim import non_infected_probs
+
+SHARD_SUFFIX = '.npz'
+
+# Graphs already loaded by this process, keyed by their spec, see _load_graph
+_loaded_graphs = {}
+
+
+class Sweep(object):
+    """
+    Declarative parameter sweep over graphs x models x transmission rates x vaccination strategies and rates.
+
+    Every cell of the grid is simulated independently and stored as its own NPZ shard in the sweep directory,
+    written atomically, so an interrupted sweep resumes by skipping the shards already on disk, and a sweep
+    extended with new rates, vaccination rates, models or graphs only computes the new cells.
+    Each cell draws from a seed derived from the sweep seed and the cell itself, so results do not depend on
+    the order or the process in which cells are run.
+    """
+
+    def __init__(self, name: str, graphs: dict, models: list[str], rates: list | np.ndarray,
+                 vac_rates: list | np.ndarray = (0.0,), strategies: list[str] = ('uniform',), repeats: int = 50,
+                 prob: float = 0.05, seed: int = 0, directory: str | Path | None = None):
+        """
+        :param name: name of the sweep, used as its directory under saved_graphs/sweeps.
+        :param graphs: graph name -> spec. A spec is either a file name for src.io.load_csr or a dict of
+         random_graph arguments, generated through the graph cache; a missing 'seed' defaults to the sweep seed.
+        :param models: model names, keys of MODELS.
+        :param rates: transmission rates.
+        :param vac_rates: fractions of nodes vaccinated.
+        :param strategies: vaccination strategies, see src.graph.vaccination.vaccination_mask.
+        :param repeats: repeats per cell.
+        :param prob: initial probability of infection of the 'sir' model.
+        :param seed: root seed of the sweep.
+        :param directory: where to keep the shards. Defaults to saved_graphs/sweeps/<name>.
+        """
+        for model in models:
+            if model not in MODELS:
+                raise Exception(f'Model {model} is not supported.')
+        for strategy in strategies:
+            if strategy not in STRATEGIES:
+                raise Exception(f'Method {strategy} is not supported.')
+        if repeats < 1:
+            raise ValueError('Number of repeats must be positive.')
+
+        self.name = name
+        self.graphs = {key: dict(spec, seed=spec.get('seed', seed)) if isinstance(spec, dict) else str(spec)
+                       for key, spec in graphs.items()}
+        self.models = list(models)
+        self.rates = [float(rate) for rate in rates]
+        self.vac_rates = [float(vac_rate) for vac_rate in vac_rates]
+        self.strategies = list(strategies)
+        self.repeats = repeats
+        self.prob = prob
+        self.seed = seed
+        self.directory = Path(directory) if directory is not None else save_dir / 'sweeps' / name
+
+    def cells(self) -> list[dict]:
+        """
+        :return: every cell of the grid, as a dict of its parameters and shard key.
+        """
+        cells = []
+        grid = itertools.product(self.graphs, self.models, self.rates, self.strategies, self.vac_rates)
+        for graph, model, rate, strategy, vac_rate in grid:
+            cell = {'graph': graph, 'model': model, 'rate': rate, 'strategy': strategy, 'vac_rate': vac_rate}
+            cell['key'] = _cell_key(cell)
+            cells.append(cell)
+        return cells
+
+    def pending(self) -> list[dict]:
+        """
+        :return: the cells without a shard on disk.
+        """
+        return [cell for cell in self.cells() if not (self.directory / (cell['key'] + SHARD_SUFFIX)).exists()]
+
+    def run(self, workers: int | None = None, verbose: bool = True) -> dict:
+        """
+        Compute every pending cell on a process pool, writing each shard as soon as it is done.
+        :param workers: number of worker processes. 1 runs the cells in this process; None uses all cores.
+        :param verbose: whether to print progress.
+        :return: all results of the sweep, see load_results.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._check_spec()
+        pending = self.pending()
+        total = len(self.cells())
+        done = total - len(pending)
+        if verbose and done:
+            print(f'{self.name}: {done}/{total} cells already done')
+
+        settings = {'repeats': self.repeats, 'prob': self.prob, 'seed': self.seed}
+        if workers == 1:
+            for cell in pending:
+                _run_cell(self.directory, self.graphs[cell['graph']], cell, settings)
+                done += 1
+                if verbose:
+                    print(f"{self.name}: [{done}/{total}] {cell['key']}")
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(_run_cell, self.directory, self.graphs[cell['graph']], cell, settings): cell
+                           for cell in pending}
+                for future in as_completed(futures):
+                    future.result()
+                    done += 1
+                    if verbose:
+                        print(f"{self.name}: [{done}/{total}] {futures[future]['key']}")
+        return self.results()
+
+    def results(self) -> dict:
+        """
+        :return: the results of the cells of this sweep found on disk, see load_results.
+        """
+        keys = {cell['key'] for cell in self.cells()}
+        return load_results(self.directory, keys=keys)
+
+    def _check_spec(self) -> None:
+        # Shards are only comparable if the settings they were computed with agree
+        spec_path = self.directory / 'spec.json'
+        spec = {'graphs': self.graphs, 'repeats': self.repeats, 'prob': self.prob, 'seed': self.seed}
+        if spec_path.exists():
+            stored = json.loads(spec_path.read_text())
+            for field in ('repeats', 'prob', 'seed'):
+                if stored[field] != spec[field]:
+                    raise ValueError(f'Sweep {self.name} was started with {field}={stored[field]}; '
+                                     f'use another name for {field}={spec[field]}.')
+            for graph, graph_spec in self.graphs.items():
+                if stored['graphs'].get(graph, graph_spec) != graph_spec:
+                    raise ValueError(f'Sweep {self.name} was started with another spec for graph {graph}.')
+            spec['graphs'] = dict(stored['graphs'], **self.graphs)
+        _atomic_write(self.directory, spec_path, lambda f: f.write(json.dumps(spec, indent=2).encode('utf-8')))
+
+
+def load_results(directory: str | Path, keys: set[str] | None = None) -> dict:
+    """
+    Gather the shards of a sweep into columns.
+    :param directory: the sweep directory.
+    :param keys: shard keys to load. Defaults to all shards in the directory.
+    :return: A dict of arrays with one entry per cell: 'graph', 'model', 'rate', 'strategy' and 'vac_rate', and for each result
+     field of the models a (cells, repeats) float array, nan-padded for cells of models without that field.
+    """
+    shards = []
+    for path in sorted(Path(directory).glob('*' + SHARD_SUFFIX)):
+        if keys is not None and path.stem not in keys:
+            continue
+        with np.load(path) as shard:
+            shards.append({name: shard[name] for name in shard.files})
+
+    columns = {name: np.array([shard[name].item() for shard in shards]) for name in ('graph', 'model', 'strategy')}
+    for name in ('rate', 'vac_rate'):
+        columns[name] = np.array([float(shard[name]) for shard in shards])
+    fields = sorted({name for shard in shards for name in shard} - {'graph', 'model', 'strategy', 'rate', 'vac_rate'})
+    for name in fields:
+        width = max(len(shard[name]) for shard in shards if name in shard)
+        column = np.full((len(shards), width), np.nan)
+        for row, shard in enumerate(shards):
+            if name in shard:
+                column[row, :len(shard[name])] = shard[name]
+        columns[name] = column
+    return columns
+
+
+def _sir_cell(graph: CsrGraph, rate: float, vac_mask: np.ndarray, repeats: int, prob: float,
+              rng: np.random.Generator) -> dict:
+    _, final_sizes, durations = sir_replicas(graph, rate, prob, repeat=repeats, vac_mask=vac_mask, rng=rng)
+    return {'final_size': final_sizes, 'duration': durations}
+
+
+def _percolation_cell(graph: CsrGraph, rate: float, vac_mask: np.ndarray, repeats: int, prob: float,
+                      rng: np.random.Generator) -> dict:
+    sizes, samples = percolate(graph, rate, repeat=repeats, vac_mask=vac_mask, sample_nodes=1, rng=rng)
+    return {'cluster_size': samples[:, 0], 'largest_cluster': np.array([s.max() for s in sizes])}
+
+
+def _message_passing_cell(graph: CsrGraph, rate: float, vac_mask: np.ndarray, repeats: int, prob: float,
+                          rng: np.random.Generator) -> dict:
+    if vac_mask is None:
+        probs = non_infected_probs(graph, rate, tol=1e-6)
+        return {'infected_fraction': np.array([1 - probs.mean()])}
+    # Vaccinated nodes neither catch nor pass on the infection, so their edges are dropped
+    probs = non_infected_probs(graph.drop_nodes(vac_mask), rate, tol=1e-6)
+    return {'infected_fraction': np.array([np.sum(1 - probs[~vac_mask]) / graph.num_nodes])}
+
+
+# Model name -> function (graph, rate, vac_mask, repeats, prob, rng) returning a dict of result arrays
+MODELS = {
+    'sir': _sir_cell,
+    'percolation': _percolation_cell,
+    'message_passing': _message_passing_cell,
+}
+
+
+def _run_cell(directory: Path, graph_spec: str | dict, cell: dict, settings: dict) -> None:
+    graph = _load_graph(graph_spec)
+    seed = settings['seed']
+    # The vaccination draw depends only on the graph, strategy and vaccination rate, so that all models and
+    # rates of a sweep are compared on the same vaccinated nodes
+    vac_mask = None
+    if cell['vac_rate'] > 0:
+        vac_key = f"{cell['graph']}|{cell['strategy']}|{cell['vac_rate']!r}"
+        vac_rng = np.random.default_rng([seed, zlib.crc32(vac_key.encode())])
+        vac_mask = vaccination_mask(graph, cell['vac_rate'], strategy=cell['strategy'], rng=vac_rng)
+    rng = np.random.default_rng([seed, zlib.crc32(cell['key'].encode())])
+    results = MODELS[cell['model']](graph, cell['rate'], vac_mask, settings['repeats'], settings['prob'], rng)
+
+    arrays = {name: np.asarray(value) for name, value in results.items()}
+    arrays.update(graph=np.array(cell['graph']), model=np.array(cell['model']), rate=np.array(cell['rate']),
+                  strategy=np.array(cell['strategy']), vac_rate=np.array(cell['vac_rate']))
+    _atomic_write(directory, directory / (cell['key'] + SHARD_SUFFIX), lambda f: np.savez(f, **arrays))
+
+
+def _load_graph(spec: str | dict) -> CsrGraph:
+    # A file is keyed by its resolved path and modification time, so a rewritten file is loaded again
+    if isinstance(spec, dict):
+        key = json.dumps(spec, sort_keys=True)
+    else:
+        path = save_dir / spec
+        key = f'{path.resolve()}@{path.stat().st_mtime_ns}'
+    if key not in _loaded_graphs:
+        if isinstance(spec, dict):
+            _loaded_graphs[key] = cached_random_graph(**dict(spec, csr=True))
+        else:
+            _loaded_graphs[key] = load_csr(spec)
+    return _loaded_graphs[key]
+
+
+def _cell_key(cell: dict) -> str:
+    # The readable part may merge distinct cells (rounded rates, sanitised names), so it is followed by a hash
+    # of the exact cell
+    key = f"{cell['graph']}__{cell['model']}__r{cell['rate']:.6g}__{cell['strategy']}{cell['vac_rate']:.6g}"
+    exact = json.dumps([cell['graph'], cell['model'], repr(cell['rate']), cell['strategy'], repr(cell['vac_rate'])])
+    return re.sub(r'[^\w.\-]', '_', key) + '__' + hashlib.sha1(exact.encode('utf-8')).hexdigest()[:12]
+
+
+def _atomic_write(directory: Path, path: Path, write) -> None:
+    # Write to a temporary file and rename it into place, so an interrupted write never leaves a partial file
+    fd, tmp_name = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
\ No newline at end of file
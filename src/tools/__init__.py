@@ -1,2 +1,3 @@
 from .mathtools import *
-from .errors import *
\ No newline at end of file
+from .errors import *
+from .instrument import Instrument
\ No newline at end of file
@@ -0,0 +1,172 @@
+import json
+import marshal
+import pstats
+import time
+from contextlib import nullcontext
+
+# Instrument currently recording, if any. Hot paths only pay a global lookup and a None check while it is unset.
+_active = None
+_null_phase = nullcontext()
+
+
+class Instrument(object):
+    """
+    Opt-in recorder of phase timers and event counters of the simulation hot paths.
+    Recording is active inside a with block:
+
+        with Instrument() as rec:
+            sir.run(rate)
+        rec.print_stats()
+
+    Phases may nest; like cProfile, the total time of a phase excludes its nested phases and the cumulative time
+    includes them.
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.phases = {} # name -> [calls, total time, cumulative time, {caller: calls}]
+        self._stack = []
+        self._previous = None
+
+    def __enter__(self):
+        global _active
+        self._previous = _active
+        _active = self
+        return self
+
+    def __exit__(self, *exc_info):
+        global _active
+        _active = self._previous
+        self._previous = None
+        return False
+
+    def count(self, name: str, value: int = 1) -> None:
+        """
+        Add to a counter.
+        :param name: counter name, e.g. 'sir.steps'.
+        :param value: amount to add.
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def phase(self, name: str) -> '_Phase':
+        """
+        :param name: phase name, e.g. 'sir.advance'.
+        :return: a context manager timing its body as one call of the phase.
+        """
+        return _Phase(self, name)
+
+    def to_dict(self) -> dict:
+        """
+        :return: the counters, and for each phase its number of calls, total and cumulative time in seconds.
+        """
+        return {
+            'counters': dict(self.counters),
+            'phases': {name: {'calls': calls, 'tottime': tottime, 'cumtime': cumtime}
+                       for name, (calls, tottime, cumtime, _) in self.phases.items()},
+        }
+
+    def to_json(self, filename: str | None = None) -> str:
+        """
+        Export the recording as JSON.
+        :param filename: file to write to, if given.
+        :return: the JSON text.
+        """
+        text = json.dumps(self.to_dict(), indent=2)
+        if filename is not None:
+            with open(filename, 'w') as f:
+                f.write(text)
+        return text
+
+    def create_stats(self) -> None:
+        """
+        Fill self.stats in the layout of cProfile.Profile.stats, with one pseudo-function per phase,
+        so that pstats.Stats(instrument) can read the recording.
+        """
+        self.stats = {}
+        for name, (calls, tottime, cumtime, callers) in self.phases.items():
+            caller_stats = {_stats_key(caller): n for caller, n in callers.items()}
+            self.stats[_stats_key(name)] = (calls, calls, tottime, cumtime, caller_stats)
+
+    def dump_stats(self, filename: str) -> None:
+        """
+        Write the phases to a file in the binary format of cProfile, readable by pstats and profile viewers.
+        :param filename: output file.
+        """
+        self.create_stats()
+        with open(filename, 'wb') as f:
+            marshal.dump(self.stats, f)
+
+    def print_stats(self, sort: str = 'cumulative') -> pstats.Stats:
+        """
+        Print the phases as a pstats table, followed by the counters.
+        :param sort: pstats sort key.
+        :return: the pstats.Stats object.
+        """
+        stats = pstats.Stats(self)
+        stats.sort_stats(sort).print_stats()
+        for name, value in sorted(self.counters.items()):
+            print(f'{value:>15}  {name}')
+        return stats
+
+
+class _Phase(object):
+    # Timer of one phase call; time spent in nested phases is charged to them rather than to this one
+
+    def __init__(self, instrument: Instrument, name: str):
+        self.instrument = instrument
+        self.name = name
+        self.start = 0.0
+        self.nested = 0.0
+
+    def __enter__(self):
+        self.instrument._stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        stack = self.instrument._stack
+        stack.pop()
+        caller = stack[-1].name if stack else None
+        if stack:
+            stack[-1].nested += elapsed
+        record = self.instrument.phases.setdefault(self.name, [0, 0.0, 0.0, {}])
+        record[0] += 1
+        record[1] += elapsed - self.nested
+        record[2] += elapsed
+        if caller is not None:
+            record[3][caller] = record[3].get(caller, 0) + 1
+        return False
+
+
+def current() -> Instrument | None:
+    """
+    :return: the Instrument recording at the moment, or None.
+    """
+    return _active
+
+
+def count(name: str, value: int = 1) -> None:
+    """
+    Add to a counter of the active Instrument; does nothing while none is recording.
+    :param name: counter name.
+    :param value: amount to add.
+    """
+    if _active is not None:
+        _active.count(name, value)
+
+
+def phase(name: str):
+    """
+    Time a phase on the active Instrument.
+    :param name: phase name.
+    :return: a context manager, which does nothing while no Instrument is recording.
+    """
+    if _active is None:
+        return _null_phase
+    return _active.phase(name)
+
+
+def _stats_key(name: str) -> tuple[str, int, str]:
+    # pstats identifies functions by (file, line, name)
+    return '~', 0, name
\ No newline at end of file
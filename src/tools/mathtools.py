@@ -1,23 +1,107 @@
+import os
+
 import numpy as np
 
-def bernoulli_sample(p: float) -> int:
+# Generator shared by calls that are not given one, created on first use and reseeded in forked children
+_default_rng = None
+
+
+def get_rng(rng: np.random.Generator | np.random.SeedSequence | int | None = None) -> np.random.Generator:
+    """
+    Resolve the rng argument accepted throughout src/ into a generator.
+    :param rng: a Generator, which is returned unchanged; a seed or SeedSequence, from which a new generator is made;
+     or None for the shared unseeded generator of this process.
+    :return: a numpy Generator.
+    """
+    global _default_rng
+    if rng is not None:
+        return np.random.default_rng(rng)
+    if _default_rng is None:
+        _default_rng = np.random.default_rng()
+    return _default_rng
+
+
+def _reset_default_rng() -> None:
+    # A forked process would otherwise repeat its parent's random stream
+    global _default_rng
+    _default_rng = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_default_rng)
+
+
+class UniformPool(object):
+    """
+    Buffered pool of pre-drawn uniform samples, for scalar call sites that cannot be batched yet.
+    Drawing one number from the pool is a list index rather than a call into the generator.
+    """
+
+    def __init__(self, rng: np.random.Generator | int | None = None, buffer_size: int = 2 ** 16):
+        """
+        :param rng: random generator or seed to refill the pool from.
+        :param buffer_size: number of uniforms drawn per refill.
+        """
+        if buffer_size < 1:
+            raise ValueError('Buffer size must be positive.')
+        self.rng = get_rng(rng)
+        self.buffer_size = buffer_size
+        self._buffer = []
+        self._pos = 0
+
+    def random(self) -> float:
+        """
+        :return: a uniform sample on [0, 1).
+        """
+        if self._pos == len(self._buffer):
+            self._buffer = self.rng.random(self.buffer_size).tolist()
+            self._pos = 0
+        u = self._buffer[self._pos]
+        self._pos += 1
+        return u
+
+    def bernoulli(self, p: float) -> int:
+        """
+        :param p: parameter (probability) of the distribution.
+        :return: an integer of 0 or 1.
+        """
+        return 1 if self.random() < p else 0
+
+    def integers(self, high: int) -> int:
+        """
+        :param high: exclusive upper bound, small against 2**53.
+        :return: a uniform integer in [0, high).
+        """
+        return int(self.random() * high)
+
+
+def bernoulli_sample(p: float, size: int | tuple | None = None,
+                     rng: np.random.Generator | int | None = None) -> int | np.ndarray:
     """
     Returns a sample from a bernoulli distribution.
     :param p: parameter (probability) of the distribution.
-    :return: an integer of 0 or 1.
+    :param size: output shape; None for a single sample.
+    :param rng: random generator or seed. Defaults to the shared generator, see get_rng.
+    :return: an integer of 0 or 1, or an int8 array of them.
     """
     if p < 0 or p > 1:
         raise ValueError('Bernoulli probability must be between 0 and 1.')
 
-    return 1 if np.random.rand() < p else 0
+    rng = get_rng(rng)
+    if size is None:
+        return 1 if rng.random() < p else 0
+    return (rng.random(size) < p).astype(np.int8)
 
 
-def sample_edge_count(num_nodes: int, p: float) -> int:
+def sample_edge_count(num_nodes: int, p: float, size: int | tuple | None = None,
+                      rng: np.random.Generator | int | None = None) -> int | np.ndarray:
     """
     Sample an edge count for a given graph according to binomial distribution.
     :param num_nodes: number of nodes of the graph.
     :param p: probability of generation of an edge.
-    :return: an integer of edge count.
+    :param size: output shape; None for a single sample.
+    :param rng: random generator or seed. Defaults to the shared generator, see get_rng.
+    :return: an integer of edge count, or an array of them.
     """
 
     if num_nodes <= 1:
@@ -26,29 +110,36 @@ def sample_edge_count(num_nodes: int, p: float) -> int:
     if p < 0 or p > 1:
         raise ValueError('Edge generation probability must be between 0 and 1.')
 
-    n = num_nodes * (num_nodes - 1) / 2
-    return np.random.binomial(n, p)
+    n = num_nodes * (num_nodes - 1) // 2
+    sample = get_rng(rng).binomial(n, p, size=size)
+    return int(sample) if size is None else sample
 
 
-def geometric_sample(p: float) -> int:
+def geometric_sample(p: float, size: int | tuple | None = None,
+                     rng: np.random.Generator | int | None = None) -> int | np.ndarray:
     """
     Sample from a geometric distribution.
     :param p: Probability of success.
-    :return: an integer of number of trials at first success.
+    :param size: output shape; None for a single sample.
+    :param rng: random generator or seed. Defaults to the shared generator, see get_rng.
+    :return: an integer of number of trials at first success, or an array of them.
     """
 
     if p < 0 or p > 1:
         raise ValueError('Geometric probability must be between 0 and 1.')
 
-    rng = np.random.default_rng()
-    return int(rng.geometric(p=p, size=1)) - 1
+    sample = get_rng(rng).geometric(p=p, size=size) - 1
+    return int(sample) if size is None else sample
 
 
-def poisson_sample(l: float) -> int:
+def poisson_sample(l: float, size: int | tuple | None = None,
+                   rng: np.random.Generator | int | None = None) -> int | np.ndarray:
     """
     Sample from a poisson distribution.
     :param l: Mean of distribution.
-    :return: an integer of sample.
+    :param size: output shape; None for a single sample.
+    :param rng: random generator or seed. Defaults to the shared generator, see get_rng.
+    :return: an integer of sample, or an array of them.
     """
-    rng = np.random.default_rng()
-    return int(rng.poisson(l))
\ No newline at end of file
+    sample = get_rng(rng).poisson(l, size=size)
+    return int(sample) if size is None else sample